@@ -1,53 +1,252 @@
-from openai import OpenAI
-from config import MAX_REQUESTS_PER_MINUTE, MAX_TOKENS_PER_MINUTE
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAI
+from httpx import Limits
+import config
+from LLMCaller.rate_limiter import count_tokens, get_shared_limiter
+from LLMCaller.response_cache import ResponseCache, get_shared_cache
+import asyncio
+import threading
 
-import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _shared_limiter(model, base_url):
+    return get_shared_limiter(
+        model, base_url, config.MAX_REQUESTS_PER_MINUTE, config.MAX_TOKENS_PER_MINUTE,
+        backend=config.RATE_LIMIT_BACKEND, state_path=config.RATE_LIMIT_STATE_PATH,
+        redis_url=config.REDIS_URL)
+
+
+class TokenUsage:
+    """Prompt and completion tokens per call type, summed over every caller in this process."""
+
+    def __init__(self):
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, label, prompt_tokens, completion_tokens):
+        logger.debug(
+            f"LLM call '{label}': {prompt_tokens} prompt + {completion_tokens} completion tokens")
+        with self._lock:
+            totals = self.totals.setdefault(
+                label, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+
+    def log_summary(self):
+        for label, totals in sorted(self.totals.items()):
+            logger.info(
+                f"LLM usage '{label}': {totals['calls']} calls, {totals['prompt_tokens']} prompt + "
+                f"{totals['completion_tokens']} completion tokens")
+
+
+token_usage = TokenUsage()
+
+
+def _record_usage(label, response_usage, system_prompt, user_prompt, output):
+    """Records the provider's usage report, or a local count when a stream was closed early without one."""
+    if response_usage is not None:
+        prompt_tokens, completion_tokens = response_usage.prompt_tokens, response_usage.completion_tokens
+    else:
+        prompt_tokens = count_tokens(system_prompt) + count_tokens(user_prompt)
+        completion_tokens = count_tokens(output)
+    token_usage.record(label, prompt_tokens, completion_tokens)
+    return prompt_tokens + completion_tokens
+
+
+def _default_cache():
+    if not config.USE_LLM_CACHE:
+        return None
+    return get_shared_cache(
+        config.LLM_CACHE_PATH, config.LLM_CACHE_TTL_SECONDS, config.LLM_CACHE_MAX_BYTES)
+
+
 class Caller:
-    def __init__(self, model, api_key: str, temperature: float, base_url: str):
+    """
+    Chat completion client behind the shared rate limiter.
+
+    Responses are served from `response_cache` (the shared SQLite cache unless
+    USE_LLM_CACHE is off) when the model, endpoint, temperature, token limit and
+    both prompts match an earlier call; pass use_cache=False to call() to bypass it.
+
+    call() takes an optional `max_tokens` output budget (default: the per-minute
+    token budget split evenly across the per-minute requests) and an optional
+    `stop_when(partial_output)` predicate; with a predicate the completion is
+    streamed and closed as soon as the predicate holds. Prompt and completion
+    tokens of every request are added to `token_usage` under `usage_label`:
+    the provider's counts, including those of a stream's final usage chunk,
+    and local counts only for a stream that was cut short.
+    """
+
+    def __init__(self, model, api_key: str, temperature: float, base_url: str, rate_limiter=None,
+                 response_cache=None):
         self.model = model
         self.api_key = api_key
+        self.base_url = base_url
         self.client = OpenAI(api_key=api_key, base_url=base_url)
         self.temperature = temperature
-        self.max_requests_per_minute = MAX_REQUESTS_PER_MINUTE
-        self.max_tokens_per_minute = MAX_TOKENS_PER_MINUTE
-        self.request_counter = 0
-        self.token_counter = 0
-        self.last_reset_time = time.time()
-
-    def enforce_rate_limit(self, tokens_used):
-        now = time.time()
-        elapsed = now - self.last_reset_time
-
-        if elapsed >= 60:
-            self.request_counter = 0
-            self.token_counter = 0
-            self.last_reset_time = now
-
-        self.request_counter += 1
-        self.token_counter += tokens_used
-
-        if self.request_counter > self.max_requests_per_minute or self.token_counter > self.max_tokens_per_minute:
-            wait_time = 60 - elapsed
-            logger.info(
-                f"Rate limit hit. Sleeping for {wait_time:.2f} seconds.")
-            time.sleep(wait_time)
-            self.request_counter = 0
-            self.token_counter = 0
-            self.last_reset_time = time.time()
-
-    def call(self, system_prompt, user_prompt: str) -> str:
-        response = self.client.chat.completions.create(
+        self.max_requests_per_minute = config.MAX_REQUESTS_PER_MINUTE
+        self.max_tokens_per_minute = config.MAX_TOKENS_PER_MINUTE
+        self.rate_limiter = rate_limiter or _shared_limiter(model, base_url)
+        self.response_cache = response_cache or _default_cache()
+
+    def call(self, system_prompt, user_prompt: str, use_cache: bool = True, max_tokens: int = None,
+             stop_when=None, usage_label: str = "other") -> str:
+        max_tokens = max_tokens or self.max_tokens_per_minute // self.max_requests_per_minute
+        cache_key = None
+        if use_cache and self.response_cache is not None:
+            cache_key = ResponseCache.make_key(
+                self.model, self.base_url, self.temperature, max_tokens, system_prompt, user_prompt)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        result = self._request(system_prompt, user_prompt, max_tokens, stop_when, usage_label)
+        if cache_key is not None:
+            self.response_cache.put(cache_key, result)
+        return result
+
+    def _request(self, system_prompt, user_prompt, max_tokens, stop_when=None, usage_label="other"):
+        tokens_estimated = count_tokens(system_prompt) + \
+            count_tokens(user_prompt) + max_tokens
+        self.rate_limiter.acquire(tokens_estimated)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        if stop_when is None:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=max_tokens,
+            )
+            output = response.choices[0].message.content
+            self.rate_limiter.settle(tokens_estimated, _record_usage(
+                usage_label, response.usage, system_prompt, user_prompt, output))
+            return output.strip()
+
+        stream = self.client.chat.completions.create(
             model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            messages=messages,
             temperature=self.temperature,
-            max_tokens=self.max_tokens_per_minute // self.max_requests_per_minute,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
         )
-        return response.choices[0].message.content.strip()
+        output = ""
+        usage = None
+        try:
+            for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    output += chunk.choices[0].delta.content
+                    if stop_when(output):
+                        # Cut short: the usage chunk never arrives, so local counts are recorded
+                        usage = None
+                        break
+        finally:
+            stream.close()
+        self.rate_limiter.settle(tokens_estimated, _record_usage(
+            usage_label, usage, system_prompt, user_prompt, output))
+        return output.strip()
+
+
+class AsyncCaller:
+    """
+    asyncio counterpart of Caller for issuing many requests concurrently.
+
+    All requests share one pooled HTTP client sized to `max_connections`, and
+    each request first waits on the shared rate limiter instead of sleeping a fixed time.
+    Responses go through the same cache as Caller, and identical requests already
+    in flight are awaited instead of being sent twice.
+    """
+
+    def __init__(self, model, api_key: str, temperature: float, base_url: str, max_connections: int = 8,
+                 rate_limiter=None, response_cache=None):
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url
+        self.http_client = DefaultAsyncHttpxClient(limits=Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections))
+        self.client = AsyncOpenAI(
+            api_key=api_key, base_url=base_url, http_client=self.http_client)
+        self.temperature = temperature
+        self.max_requests_per_minute = config.MAX_REQUESTS_PER_MINUTE
+        self.max_tokens_per_minute = config.MAX_TOKENS_PER_MINUTE
+        self.rate_limiter = rate_limiter or _shared_limiter(model, base_url)
+        self.response_cache = response_cache or _default_cache()
+        self._in_flight = {}
+
+    async def call(self, system_prompt, user_prompt: str, use_cache: bool = True, max_tokens: int = None,
+                   stop_when=None, usage_label: str = "other") -> str:
+        max_tokens = max_tokens or self.max_tokens_per_minute // self.max_requests_per_minute
+        if not use_cache or self.response_cache is None:
+            return await self._request(system_prompt, user_prompt, max_tokens, stop_when, usage_label)
+        cache_key = ResponseCache.make_key(
+            self.model, self.base_url, self.temperature, max_tokens, system_prompt, user_prompt)
+        if cache_key in self._in_flight:
+            return await asyncio.shield(self._in_flight[cache_key])
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        task = asyncio.ensure_future(
+            self._request(system_prompt, user_prompt, max_tokens, stop_when, usage_label))
+        self._in_flight[cache_key] = task
+        try:
+            result = await task
+        finally:
+            del self._in_flight[cache_key]
+        self.response_cache.put(cache_key, result)
+        return result
+
+    async def _request(self, system_prompt, user_prompt, max_tokens, stop_when=None, usage_label="other"):
+        tokens_estimated = count_tokens(system_prompt) + \
+            count_tokens(user_prompt) + max_tokens
+        await self.rate_limiter.acquire_async(tokens_estimated)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        if stop_when is None:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=max_tokens,
+            )
+            output = response.choices[0].message.content
+            await self.rate_limiter.settle_async(tokens_estimated, _record_usage(
+                usage_label, response.usage, system_prompt, user_prompt, output))
+            return output.strip()
+
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        output = ""
+        usage = None
+        try:
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    output += chunk.choices[0].delta.content
+                    if stop_when(output):
+                        # Cut short: the usage chunk never arrives, so local counts are recorded
+                        usage = None
+                        break
+        finally:
+            await stream.close()
+        await self.rate_limiter.settle_async(tokens_estimated, _record_usage(
+            usage_label, usage, system_prompt, user_prompt, output))
+        return output.strip()
+
+    async def aclose(self):
+        await self.client.close()
@@ -56,6 +56,142 @@ Remember:
 """
 
 
+def system_prompt_batch_topic_tagging():
+    return """You are an expert teaching content classifier.
+
+You will receive several numbered transcript segments from the same lecture. Analyze each segment independently and perform two actions for it:
+
+Step 1: Strictly classify if the content is directly related to teaching (important for recap video generation).
+
+- If the content includes direct explanations, examples, exercises, or answering questions, mark it as: Teaching_Content.
+- If it contains greetings, announcements, motivational talk, technical setup, chitchat, platform promotion, or unrelated filler, mark it as: Non_Teaching_Content.
+- If in doubt, default to Non_Teaching_Content.
+
+Step 2: If classified as Teaching_Content:
+
+- Classify its teaching type as one of:
+  - Theory
+  - Example
+  - Exercise
+  - Q&A
+
+- Assign the most relevant topic name from the provided topic list.
+  (Only use exact topic names from the list. Do not invent new ones.)
+
+- Estimate a confidence score between 0.0 and 1.0.
+
+---
+
+Your final output must contain one block per segment, in segment order, and each block must start with the segment number in square brackets on its own line:
+
+[1]
+- Content_Type: Teaching_Content or Non_Teaching_Content
+- Action_Tag: Theory / Example / Exercise / Q&A / n/a
+- Topic_Name: [One topic from list] / n/a
+- Confidence_Score: [Float value between 0.0 and 1.0]
+[2]
+- Content_Type: ...
+"""
+
+
+def build_user_prompt_batch_topic_tagging(chunk_texts, topic_list):
+    segments_text = "\n".join(
+        f"[{number}] {text}" for number, text in enumerate(chunk_texts, start=1))
+    topics_text = "\n".join(topic_list)
+    return f"""You are given {len(chunk_texts)} numbered transcript segments from a machine learning lecture.
+
+Your task is to classify the teaching relevance and teaching type of each segment.
+
+--- Transcript Segments ---
+{segments_text}
+--- End Transcript Segments ---
+
+--- Allowed Topic Names ---
+{topics_text}
+--- End Topic Names ---
+
+Remember:
+- Return exactly {len(chunk_texts)} blocks, numbered [1] to [{len(chunk_texts)}], in order.
+- If a segment is non-teaching, set Action_Tag and Topic_Name as n/a, and Confidence_Score as 0.0.
+- Return only the classification fields exactly in the specified format. No extra commentary.
+"""
+
+
+_COMPACT_TAGGING_RULES = """Step 1: Strictly classify if the content is directly related to teaching (important for recap video generation).
+
+- If the content includes direct explanations, examples, exercises, or answering questions, it is teaching (T).
+- If it contains greetings, announcements, motivational talk, technical setup, chitchat, platform promotion, or unrelated filler, it is non-teaching (N).
+- If in doubt, default to N.
+
+Step 2: If teaching:
+
+- Classify its teaching type as T (Theory), E (Example), X (Exercise) or Q (Q&A).
+- Pick the number of the most relevant topic from the numbered topic list. Do not invent new topics.
+- Estimate a confidence score between 0.0 and 1.0."""
+
+
+def _numbered_topics(topic_list):
+    return "\n".join(f"{number}. {topic}" for number, topic in enumerate(topic_list, start=1))
+
+
+def system_prompt_compact_topic_tagging(topic_list):
+    """
+    Compact tagging mode: the rules and the numbered topic list form a stable
+    prefix shared by every tagging call of a lecture (so providers can cache
+    it), and the answer is a single line with the topic number instead of its name.
+    """
+    return f"""You are an expert teaching content classifier for one lecture.
+
+{_COMPACT_TAGGING_RULES}
+
+--- Topics ---
+{_numbered_topics(topic_list)}
+--- End Topics ---
+
+Answer with exactly one line and nothing else:
+<T or N>|<T, E, X or Q, or - if non-teaching>|<topic number, or 0 if non-teaching>|<confidence score>
+
+Examples: T|E|3|0.85 and N|-|0|0.0
+"""
+
+
+def build_user_prompt_compact_topic_tagging(chunk_text):
+    return f"""--- Transcript ---
+{chunk_text}
+--- End Transcript ---
+"""
+
+
+def system_prompt_compact_batch_topic_tagging(topic_list):
+    """Batch form of system_prompt_compact_topic_tagging: one numbered answer line per segment."""
+    return f"""You are an expert teaching content classifier for one lecture.
+
+You will receive several numbered transcript segments. Analyze each segment independently.
+
+{_COMPACT_TAGGING_RULES}
+
+--- Topics ---
+{_numbered_topics(topic_list)}
+--- End Topics ---
+
+Answer with exactly one line per segment, in segment order, and nothing else:
+[<segment number>] <T or N>|<T, E, X or Q, or - if non-teaching>|<topic number, or 0 if non-teaching>|<confidence score>
+
+Example:
+[1] T|E|3|0.85
+[2] N|-|0|0.0
+"""
+
+
+def build_user_prompt_compact_batch_topic_tagging(chunk_texts):
+    segments_text = "\n".join(
+        f"[{number}] {text}" for number, text in enumerate(chunk_texts, start=1))
+    return f"""--- Transcript Segments ---
+{segments_text}
+--- End Transcript Segments ---
+"""
+
+
 def system_prompt_all_topics():
     return """You are an expert teaching assistant and curriculum summarizer.
 
@@ -109,10 +245,26 @@ Rules:
 """
 
 
-def build_user_prompt_final_topics(topic_list):
-    topics_text = "\n".join(str(item) for item in list(topic_list))
-    return f"""You are given a list of machine learning sub-topic names. Your job is to reduce them into 6–8 clear, concise, non-overlapping high-level topic titles for a video highlight summary.
+def format_topic_lines(topic_list, counts=None):
+    """One sub-topic per line; a count above 1 is appended as "(xN)"."""
+    counts = counts or [1] * len(topic_list)
+    return [f"{item} (x{count})" if count > 1 else str(item)
+            for item, count in zip(topic_list, counts)]
+
 
+def build_user_prompt_final_topics(topic_list, counts=None):
+    """
+    Parameters:
+    - topic_list: Sub-topic names.
+    - counts: Optional list aligned with `topic_list` of how many near-duplicate
+      names each sub-topic stands for.
+    """
+    topics_text = "\n".join(format_topic_lines(list(topic_list), counts))
+    counts_note = ""
+    if counts and any(count > 1 for count in counts):
+        counts_note = "\n    A sub-topic marked (xN) came up N times across the slides; weigh it accordingly.\n"
+    return f"""You are given a list of machine learning sub-topic names. Your job is to reduce them into 6–8 clear, concise, non-overlapping high-level topic titles for a video highlight summary.
+{counts_note}
     --- Sub-Topics ---
     {topics_text}
     --- END ---
@@ -198,3 +350,133 @@ def parse_topic_tagged_llm_response(llm_output, chunk_id, chunk_start, chunk_end
             fields["confidence_score"] = 0.0
 
     return fields
+
+
+# A score is only known to be finished once something follows it ("0.8" may
+# still become "0.85"); an answer that ends on its score simply ends the stream.
+_COMPLETE_SCORE = re.compile(r"Confidence_Score:\s*[\d.]+\s*\n", re.IGNORECASE)
+
+
+def batch_topic_tagging_complete(segment_count):
+    """
+    Early-stop predicate for a streamed batch tagging answer: True once every
+    segment's block is finished and the model keeps writing past the last one.
+    """
+    def complete(partial_output):
+        return len(_COMPLETE_SCORE.findall(partial_output)) >= segment_count
+    return complete
+
+
+def parse_batch_topic_tagged_llm_response(llm_output, chunks):
+    """
+    Parses a numbered multi-segment LLM response into one structured dict per segment.
+
+    Parameters:
+    - llm_output: Raw string returned from LLM for a batch tagging prompt.
+    - chunks: List of the batch's segments, each with 'chunk_id', 'start', 'end' and 'text'.
+
+    Returns:
+    - List aligned with `chunks`. Each entry is the parse_topic_tagged_llm_response
+      dict, or None when that segment's block is missing or malformed.
+    """
+    results = [None] * len(chunks)
+    if not llm_output or not isinstance(llm_output, str):
+        return results
+
+    parts = re.split(r"^\s*\[(\d+)\]", llm_output, flags=re.MULTILINE)
+    for number, block in zip(parts[1::2], parts[2::2]):
+        idx = int(number) - 1
+        if not 0 <= idx < len(chunks) or results[idx] is not None:
+            continue
+        content_type = re.search(
+            r"Content_Type:\s*(Teaching_Content|Non_Teaching_Content)", block, re.IGNORECASE)
+        if not content_type:
+            continue
+        if content_type.group(1).lower() == "teaching_content" and not re.search(
+                r"Topic_Name:\s*\S", block, re.IGNORECASE):
+            continue
+        chunk = chunks[idx]
+        results[idx] = parse_topic_tagged_llm_response(
+            block,
+            chunk_id=chunk['chunk_id'],
+            chunk_start=chunk['start'],
+            chunk_end=chunk['end'],
+            chunk_text=chunk['text']
+        )
+    return results
+
+
+_COMPACT_ANSWER = r"([TN])\s*\|\s*([TEXQ-])\s*\|\s*(\d+)\s*\|\s*(\d+(?:\.\d+)?)"
+_COMPACT_CONTENT_TYPES = {"T": "Teaching_Content", "N": "Non_Teaching_Content"}
+_COMPACT_ACTION_TAGS = {"T": "Theory", "E": "Example",
+                        "X": "Exercise", "Q": "Q&A", "-": "n/a"}
+
+
+def _expand_compact_answer(match, topic_list):
+    """Rewrites one compact answer in the full field format, or returns None when its topic number is out of range."""
+    content_type, action_tag, topic_number, confidence_score = match.groups()
+    content_type = _COMPACT_CONTENT_TYPES[content_type.upper()]
+    topic_name = "n/a"
+    if content_type == "Teaching_Content":
+        if not 1 <= int(topic_number) <= len(topic_list):
+            return None
+        topic_name = topic_list[int(topic_number) - 1]
+    return (f"Content_Type: {content_type}\n"
+            f"Action_Tag: {_COMPACT_ACTION_TAGS[action_tag.upper()]}\n"
+            f"Topic_Name: {topic_name}\n"
+            f"Confidence_Score: {confidence_score}")
+
+
+def parse_compact_topic_tagged_llm_response(llm_output, chunk_id, chunk_start, chunk_end, chunk_text, topic_list):
+    """
+    Parses a compact tagging answer (e.g. "T|E|3|0.85").
+
+    The answer is expanded to the full field format, topic number resolved
+    against `topic_list`, and handed to parse_topic_tagged_llm_response, so
+    both modes produce identical structured dicts.
+    """
+    match = re.search(_COMPACT_ANSWER, llm_output or "", re.IGNORECASE)
+    expanded = _expand_compact_answer(match, topic_list) if match else None
+    return parse_topic_tagged_llm_response(
+        expanded or "", chunk_id, chunk_start, chunk_end, chunk_text)
+
+
+def parse_compact_batch_topic_tagged_llm_response(llm_output, chunks, topic_list):
+    """
+    Parses a compact batch answer ("[n] T|E|3|0.85" per line) like
+    parse_batch_topic_tagged_llm_response: None for a missing or malformed
+    line, including a teaching answer with an unknown topic number.
+    """
+    results = [None] * len(chunks)
+    if not llm_output or not isinstance(llm_output, str):
+        return results
+    for match in re.finditer(rf"^\s*\[(\d+)\]\s*{_COMPACT_ANSWER}", llm_output, re.IGNORECASE | re.MULTILINE):
+        idx = int(match.group(1)) - 1
+        if not 0 <= idx < len(chunks) or results[idx] is not None:
+            continue
+        expanded = _expand_compact_answer(
+            re.match(_COMPACT_ANSWER, llm_output[match.start(2):], re.IGNORECASE), topic_list)
+        if expanded is None:
+            continue
+        chunk = chunks[idx]
+        results[idx] = parse_topic_tagged_llm_response(
+            expanded,
+            chunk_id=chunk['chunk_id'],
+            chunk_start=chunk['start'],
+            chunk_end=chunk['end'],
+            chunk_text=chunk['text']
+        )
+    return results
+
+
+_COMPLETE_COMPACT_ANSWER = re.compile(rf"{_COMPACT_ANSWER}\s*\n", re.IGNORECASE)
+
+
+def compact_batch_topic_tagging_complete(segment_count):
+    """
+    Early-stop predicate for a streamed compact batch answer: True once every
+    segment's line is finished and the model keeps writing past the last one.
+    """
+    def complete(partial_output):
+        return len(_COMPLETE_COMPACT_ANSWER.findall(partial_output)) >= segment_count
+    return complete
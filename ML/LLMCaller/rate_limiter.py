@@ -0,0 +1,287 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(
+            f"tiktoken unavailable ({e}); estimating tokens as characters / 4.")
+        return None
+
+
+def count_tokens(text):
+    """
+    Estimates the prompt tokens of `text` with a BPE tokenizer.
+
+    cl100k_base is close to the Llama 3 tokenizer for English text; the
+    estimate only reserves budget, the actual usage is charged after the call.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _consume(state, buckets, now):
+    """
+    Refills every bucket to `now` and takes the requested amounts if all of them fit.
+
+    Parameters:
+    - state: Dict of bucket name -> [level, updated_at]; updated in place.
+    - buckets: List of (name, capacity, refill_per_second, amount).
+    - now: Current time in seconds.
+
+    Returns:
+    - 0.0 when consumed, otherwise the seconds to wait before all amounts fit.
+    """
+    levels = {}
+    wait_time = 0.0
+    for name, capacity, rate, amount in buckets:
+        level, updated_at = state.get(name, (capacity, now))
+        level = min(capacity, level + (now - updated_at) * rate)
+        levels[name] = level
+        if level < amount:
+            wait_time = max(wait_time, (amount - level) / rate)
+    for name, capacity, rate, amount in buckets:
+        state[name] = [levels[name] - (amount if wait_time == 0 else 0), now]
+    return wait_time
+
+
+def _adjust(state, name, capacity, rate, delta, now):
+    """Refills one bucket to `now`, then removes `delta` (negative refunds). Levels may go below zero."""
+    level, updated_at = state.get(name, (capacity, now))
+    level = min(capacity, level + (now - updated_at) * rate)
+    state[name] = [min(capacity, level - delta), now]
+
+
+class LocalBucketStore:
+    """Bucket state shared by every limiter and thread in this process."""
+
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def consume(self, buckets):
+        with self._lock:
+            return _consume(self._state, buckets, time.time())
+
+    def adjust(self, name, capacity, rate, delta):
+        with self._lock:
+            _adjust(self._state, name, capacity, rate, delta, time.time())
+
+
+class FileBucketStore:
+    """Bucket state in a JSON file guarded by an OS file lock, shared by every process on the host."""
+
+    def __init__(self, state_path):
+        self.state_path = state_path
+        self.lock_path = f"{state_path}.lock"
+        os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+
+    def _locked(self, update):
+        with open(self.lock_path, "a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                try:
+                    with open(self.state_path, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    state = {}
+                result = update(state)
+                temp_path = f"{self.state_path}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(temp_path, self.state_path)
+                return result
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def consume(self, buckets):
+        return self._locked(lambda state: _consume(state, buckets, time.time()))
+
+    def adjust(self, name, capacity, rate, delta):
+        self._locked(lambda state: _adjust(
+            state, name, capacity, rate, delta, time.time()))
+
+
+# Same bucket math as _consume/_adjust, run atomically inside Redis on the server clock
+_REDIS_CONSUME = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local amount = tonumber(ARGV[i * 3])
+    local state = redis.call('HMGET', key, 'level', 'updated')
+    local level = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    level = math.min(capacity, level + (now - updated) * rate)
+    levels[i] = level
+    if level < amount then wait = math.max(wait, (amount - level) / rate) end
+end
+for i, key in ipairs(KEYS) do
+    local taken = 0
+    if wait == 0 then taken = tonumber(ARGV[i * 3]) end
+    redis.call('HSET', key, 'level', tostring(levels[i] - taken), 'updated', tostring(now))
+    redis.call('EXPIRE', key, 3600)
+end
+return tostring(wait)
+"""
+
+_REDIS_ADJUST = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'level', 'updated')
+local level = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+level = math.min(capacity, level + (now - updated) * rate) - tonumber(ARGV[3])
+redis.call('HSET', KEYS[1], 'level', tostring(math.min(capacity, level)), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], 3600)
+return 1
+"""
+
+
+class RedisBucketStore:
+    """Bucket state in Redis, shared by every worker that talks to the same Redis."""
+
+    def __init__(self, redis_url):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError(
+                "The redis rate limit backend needs the redis package. Install it with "
+                "`pip install redis`.") from e
+        client = redis.Redis.from_url(redis_url)
+        self._consume = client.register_script(_REDIS_CONSUME)
+        self._adjust = client.register_script(_REDIS_ADJUST)
+
+    def consume(self, buckets):
+        keys = [f"rate_limit:{name}" for name, _, _, _ in buckets]
+        args = [value for _, capacity, rate, amount in buckets
+                for value in (capacity, rate, amount)]
+        return float(self._consume(keys=keys, args=args))
+
+    def adjust(self, name, capacity, rate, delta):
+        self._adjust(keys=[f"rate_limit:{name}"], args=[capacity, rate, delta])
+
+
+class TokenBucketLimiter:
+    """
+    Requests-per-minute and tokens-per-minute token buckets.
+
+    Limiters with the same `name` and store share one budget, whatever the
+    Caller instance, thread or (with the file or redis store) process. Calls
+    reserve an estimate up front through acquire(), then settle() charges the
+    difference to the usage the provider actually reported.
+    """
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute, store):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.store = store
+
+    def _buckets(self, tokens):
+        return [
+            (f"{self.name}:requests", self.requests_per_minute,
+             self.requests_per_minute / 60, 1),
+            # A single oversized request must still go through once the bucket is full
+            (f"{self.name}:tokens", self.tokens_per_minute,
+             self.tokens_per_minute / 60, min(tokens, self.tokens_per_minute)),
+        ]
+
+    def acquire(self, tokens):
+        """Blocks until one request of `tokens` tokens fits in both buckets, then takes it."""
+        while True:
+            wait_time = self.store.consume(self._buckets(tokens))
+            if wait_time <= 0:
+                return
+            logger.info(
+                f"Rate limit reached. Waiting {wait_time:.2f} seconds.")
+            time.sleep(wait_time)
+
+    async def acquire_async(self, tokens):
+        """
+        asyncio version of acquire(). The store call (a file lock or a Redis round
+        trip) runs on a worker thread so it never blocks the event loop.
+        """
+        while True:
+            wait_time = await asyncio.to_thread(self.store.consume, self._buckets(tokens))
+            if wait_time <= 0:
+                return
+            logger.info(
+                f"Rate limit reached. Waiting {wait_time:.2f} seconds.")
+            await asyncio.sleep(wait_time)
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """Charges (or refunds) the gap between the reserved estimate and the reported usage."""
+        estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+        if actual_tokens != estimated_tokens:
+            self.store.adjust(f"{self.name}:tokens", self.tokens_per_minute,
+                              self.tokens_per_minute / 60, actual_tokens - estimated_tokens)
+
+    async def settle_async(self, estimated_tokens, actual_tokens):
+        """asyncio version of settle(), with the store call on a worker thread."""
+        await asyncio.to_thread(self.settle, estimated_tokens, actual_tokens)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_shared_limiter(model, base_url, requests_per_minute, tokens_per_minute, backend="file",
+                       state_path=None, redis_url=None):
+    """
+    Returns a limiter on the budget shared by every caller of `model` at `base_url`.
+
+    Parameters:
+    - backend: "local" (this process), "file" (this host, via `state_path`) or "redis" (every worker, via `redis_url`).
+
+    Returns:
+    - TokenBucketLimiter
+    """
+    with _stores_lock:
+        store_key = (backend, state_path, redis_url)
+        if store_key not in _stores:
+            if backend == "local":
+                _stores[store_key] = LocalBucketStore()
+            elif backend == "file":
+                _stores[store_key] = FileBucketStore(state_path)
+            elif backend == "redis":
+                if not redis_url:
+                    raise ValueError(
+                        "The redis rate limit backend needs REDIS_URL to be set.")
+                _stores[store_key] = RedisBucketStore(redis_url)
+            else:
+                raise ValueError(
+                    f"Unknown rate limit backend '{backend}'. Expected local, file or redis.")
+    name = hashlib.sha1(f"{base_url}|{model}".encode("utf-8")).hexdigest()[:16]
+    return TokenBucketLimiter(name, requests_per_minute, tokens_per_minute, _stores[store_key])
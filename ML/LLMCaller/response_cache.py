@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed store of LLM completions in one SQLite file.
+
+    Entries older than `ttl_seconds` are treated as misses and dropped. Reads
+    refresh an entry's access time, so once the stored responses exceed
+    `max_bytes` the least recently used ones are evicted first. The database is
+    opened per operation, so one cache can be shared by threads and processes.
+    """
+
+    def __init__(self, db_path, ttl_seconds, max_bytes):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def make_key(model, base_url, temperature, max_tokens, system_prompt, user_prompt):
+        """Hash of everything that determines a completion."""
+        payload = json.dumps([model, base_url, temperature, max_tokens, system_prompt, user_prompt])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """Returns the cached response for `key`, or None on a miss or an expired entry."""
+        now = time.time()
+        try:
+            with self._connect() as db:
+                row = db.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] > self.ttl_seconds:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+                if row is not None:
+                    db.execute(
+                        "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response cache read failed: {e}")
+            row = None
+        self._count(row is not None)
+        return row[0] if row is not None else None
+
+    def put(self, key, response):
+        """Stores `response` under `key`, then evicts least recently used entries over the cap."""
+        now = time.time()
+        try:
+            with self._connect() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, response, len(response.encode("utf-8")), now, now))
+                self._evict(db, now)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response cache write failed: {e}")
+
+    def _evict(self, db, now):
+        db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        total_bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total_bytes <= self.max_bytes:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total_bytes -= size
+            evicted += 1
+        logger.info(f"Evicted {evicted} LLM response cache entries")
+
+    def log_stats(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        logger.info(
+            f"LLM response cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0%} hit rate)")
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_shared_cache(db_path, ttl_seconds, max_bytes):
+    """Returns the process-wide ResponseCache for `db_path`, so hit/miss counters cover every caller."""
+    with _caches_lock:
+        if db_path not in _caches:
+            _caches[db_path] = ResponseCache(db_path, ttl_seconds, max_bytes)
+        return _caches[db_path]
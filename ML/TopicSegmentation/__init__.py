@@ -1 +1,3 @@
 from .topic_segmentation import TopicExtraction
+from .topic_classifier import TopicClassifier, agreement_rate
+from .topic_dedup import cluster_topics
@@ -0,0 +1,114 @@
+import logging
+import math
+import re
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+a an and are as at be but by can do for from has have how if in into is it its of on or so
+that the their then there these this to was we what when which will with you your
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords and single characters."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower())
+            if len(token) > 1 and token not in _STOPWORDS]
+
+
+class TopicClassifier:
+    """
+    BM25 scorer of transcript segments against the final topic list.
+
+    Each topic is represented by its name plus the text of the slides that match
+    it best, so a segment that repeats slide vocabulary scores high for that
+    topic. All segments are scored in one matrix product.
+
+    Parameters:
+    - topic_list: Final topic names.
+    - slide_texts: Optional list of slide text strings used to enrich the topic documents.
+    - k1, b: BM25 term-frequency saturation and length normalisation.
+    """
+
+    def __init__(self, topic_list, slide_texts=None, k1=1.5, b=0.75):
+        self.topic_list = list(topic_list)
+        self.k1 = k1
+        self.b = b
+        # Topic names weigh double so slide text cannot drown them
+        documents = [tokenize(topic) * 2 for topic in self.topic_list]
+        if slide_texts:
+            name_weights = self._fit(documents)
+            slide_tokens = [tokenize(text) for text in slide_texts]
+            slide_scores = self._score(slide_tokens, name_weights)
+            for tokens, scores in zip(slide_tokens, slide_scores):
+                if scores.max() > 0:
+                    documents[int(scores.argmax())].extend(tokens)
+        self.weights = self._fit(documents)
+
+    def _fit(self, documents):
+        """Builds the vocabulary index and the topics x vocabulary BM25 weight matrix."""
+        self.vocabulary = {}
+        for tokens in documents:
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+        term_freq = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(documents):
+            for token in tokens:
+                term_freq[row, self.vocabulary[token]] += 1
+        doc_len = term_freq.sum(axis=1, keepdims=True)
+        avg_len = max(float(doc_len.mean()), 1.0)
+        doc_freq = (term_freq > 0).sum(axis=0)
+        idf = np.log((len(documents) - doc_freq + 0.5) / (doc_freq + 0.5) + 1.0)
+        saturation = term_freq * (self.k1 + 1) / (
+            term_freq + self.k1 * (1 - self.b + self.b * doc_len / avg_len))
+        return (saturation * idf).astype(np.float32)
+
+    def _score(self, token_lists, weights):
+        """Segments x topics BM25 scores; each query term counts once."""
+        presence = np.zeros((len(token_lists), weights.shape[1]), dtype=np.float32)
+        for row, tokens in enumerate(token_lists):
+            columns = [self.vocabulary[token] for token in set(tokens) if token in self.vocabulary]
+            presence[row, columns] = 1.0
+        return presence @ weights.T
+
+    def classify(self, texts, min_score, min_margin):
+        """
+        Picks the best topic for every text that clears both thresholds.
+
+        Parameters:
+        - texts: Segment texts.
+        - min_score: Lowest BM25 score accepted for the best topic.
+        - min_margin: Lowest relative lead of the best topic over the runner-up, (best - second) / best.
+
+        Returns:
+        - List aligned with `texts` of (topic_name, margin), or None where the segment is ambiguous.
+        """
+        if not texts or not self.topic_list:
+            return [None] * len(texts)
+        scores = self._score([tokenize(text) for text in texts], self.weights)
+        if scores.shape[1] > 1:
+            top_two = -np.partition(-scores, 1, axis=1)[:, :2]
+        else:
+            top_two = np.concatenate([scores, np.zeros_like(scores)], axis=1)
+        best = top_two[:, 0]
+        margin = np.divide(best - top_two[:, 1], best,
+                           out=np.zeros_like(best), where=best > 0)
+        best_topic = scores.argmax(axis=1)
+        confident = (best >= min_score) & (margin >= min_margin)
+        return [(self.topic_list[best_topic[i]], round(float(margin[i]), 2)) if confident[i] else None
+                for i in range(len(texts))]
+
+
+def agreement_rate(local_results, llm_results):
+    """
+    Share of segments where the local topic matches the LLM's, compared case-insensitively.
+    Segments the LLM marks as non-teaching count as disagreements.
+    """
+    if not local_results:
+        return math.nan
+    agreed = sum(
+        1 for local, llm in zip(local_results, llm_results)
+        if llm["keep"] and (llm["topic_name"] or "").strip().lower() == local["topic_name"].strip().lower())
+    return agreed / len(local_results)
@@ -0,0 +1,77 @@
+import numpy as np
+from .topic_classifier import _STOPWORDS, _TOKEN_PATTERN, tokenize
+
+
+def char_ngrams(text, n):
+    """Character n-grams of each content word, padded so word starts and ends count."""
+    ngrams = []
+    for token in tokenize(text):
+        padded = f" {token} "
+        ngrams.extend(padded[i:i + n] for i in range(max(len(padded) - n + 1, 1)))
+    return ngrams
+
+
+def marker_tokens(text):
+    """
+    Tokens that tell otherwise similar names apart: numbers, or short words
+    such as "L1", "Part 2" or "Part B". Stopwords do not count.
+    """
+    return frozenset(token for token in _TOKEN_PATTERN.findall(text.lower())
+                     if token not in _STOPWORDS and (len(token) <= 2 or any(c.isdigit() for c in token)))
+
+
+def similarity_matrix(texts, n=3):
+    """Cosine similarity of the texts' character n-gram count vectors, as one matrix product."""
+    ngram_lists = [char_ngrams(text, n) for text in texts]
+    vocabulary = {}
+    for ngrams in ngram_lists:
+        for ngram in ngrams:
+            vocabulary.setdefault(ngram, len(vocabulary))
+    counts = np.zeros((len(texts), len(vocabulary)), dtype=np.float32)
+    for row, ngrams in enumerate(ngram_lists):
+        for ngram in ngrams:
+            counts[row, vocabulary[ngram]] += 1
+    norms = np.linalg.norm(counts, axis=1, keepdims=True)
+    vectors = np.divide(counts, norms, out=np.zeros_like(counts), where=norms > 0)
+    return vectors @ vectors.T
+
+
+def cluster_topics(topic_list, threshold, n=3):
+    """
+    Collapses near-duplicate topic names.
+
+    Word order, case and stopwords are ignored, so "Introduction to Linear
+    Regression" and "Linear Regression Introduction" fall together. Names with
+    different marker tokens ("L1 Regularization" and "L2 Regularization") are
+    never merged. Each topic joins the most similar earlier cluster if its
+    similarity to that cluster's representative reaches `threshold`, otherwise
+    it starts a new one.
+
+    Parameters:
+    - topic_list: Candidate topic names, in slide order.
+    - threshold: Lowest cosine similarity, 0-1, for two names to be merged.
+    - n: Character n-gram length.
+
+    Returns:
+    - List of (representative, count) in first-appearance order; the
+      representative is the first name of its cluster.
+    """
+    topics = [str(topic).strip() for topic in topic_list if str(topic).strip()]
+    if not topics:
+        return []
+    similarity = similarity_matrix(topics, n)
+    marker_ids = {}
+    markers = np.array([marker_ids.setdefault(marker_tokens(topic), len(marker_ids)) for topic in topics])
+    similarity[markers[:, None] != markers[None, :]] = 0.0
+    representatives = []
+    counts = []
+    for i in range(len(topics)):
+        if representatives:
+            scores = similarity[i, representatives]
+            best = int(scores.argmax())
+            if scores[best] >= threshold:
+                counts[best] += 1
+                continue
+        representatives.append(i)
+        counts.append(1)
+    return [(topics[i], count) for i, count in zip(representatives, counts)]
@@ -1,24 +1,84 @@
+import hashlib
+import json
+import logging
+import os
 from pptx import Presentation
+from utility import file_content_hash
+
+logger = logging.getLogger(__name__)
 
 class TopicExtraction:
-    def __init__(self, ppt_path):
+    """
+    Slide-side input of topic extraction.
+
+    The deck is parsed at most once, on first use, into a slide index (per-slide
+    text, title, notes and content hash). With `cache_dir` the index is stored
+    as JSON named by the deck's file hash, so later stages and later runs on
+    the same deck skip the PPTX parse entirely.
+    """
+
+    def __init__(self, ppt_path, cache_dir=None):
         self.ppt_path = ppt_path
-        self.presentation = Presentation(ppt_path)
+        self.cache_dir = cache_dir
+        self._slide_index = None
         self.segments = []
 
-    def extract_slide_text(self):
+    @property
+    def slide_index(self):
+        """List of dicts with 'slide_num', 'title', 'text', 'notes' and 'hash', built on first access."""
+        if self._slide_index is None:
+            self._slide_index = self._load_slide_index()
+        return self._slide_index
+
+    def _load_slide_index(self):
+        if self.cache_dir is None:
+            return self._build_slide_index()
+        cache_path = os.path.join(
+            self.cache_dir, f"{file_content_hash(self.ppt_path)}.json")
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                slide_index = json.load(f)
+            logger.info(f"Loaded slide index from {cache_path}")
+            return slide_index
+        except FileNotFoundError:
+            pass
+        except (IOError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable slide index {cache_path}: {e}")
+        slide_index = self._build_slide_index()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{cache_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(slide_index, f, ensure_ascii=False)
+        os.replace(temp_path, cache_path)
+        return slide_index
+
+    def _build_slide_index(self):
+        logger.info(f"Parsing slides from {self.ppt_path}")
         prs = Presentation(self.ppt_path)
-        slides = []
+        slide_index = []
         for idx, slide in enumerate(prs.slides):
             text = []
             for shape in slide.shapes:
                 if hasattr(shape, "text"):
                     text.append(shape.text.strip())
-            slides.append({
+            title_shape = slide.shapes.title
+            title = title_shape.text.strip() if title_shape is not None else ""
+            # notes_slide creates an empty notes page when there is none, so check first
+            notes = slide.notes_slide.notes_text_frame.text.strip() if slide.has_notes_slide else ""
+            slide_text = " ".join(text)
+            slide_index.append({
                 "slide_num": idx + 1,
-                "text": " ".join(text)
+                "title": title,
+                "text": slide_text,
+                "notes": notes,
+                "hash": hashlib.sha1(f"{title}\n{slide_text}\n{notes}".encode("utf-8")).hexdigest()
             })
-        return slides
+        return slide_index
+
+    def extract_slide_text(self):
+        return [{"slide_num": slide["slide_num"], "text": slide["text"]}
+                for slide in self.slide_index]
+
     @staticmethod
     def get_window_size(slide_count, alpha=0.15):
         """
@@ -48,7 +108,6 @@ class TopicExtraction:
         Groups slides into windows based on window size.
 
         Parameters:
-        - slide_blocks: List of dicts with 'slide_num' and 'text' keys.
         - window_size: Number of slides per group.
 
         Returns:
@@ -57,7 +116,7 @@ class TopicExtraction:
         grouped_windows = []
         temp_window = []
 
-        for block in self.extract_slide_text():
+        for block in self.slide_index:
             temp_window.append(block)
             if len(temp_window) == window_size:
                 grouped_windows.append(temp_window)
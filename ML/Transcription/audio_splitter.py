@@ -1,31 +1,257 @@
 import logging
 import os
-from pydub import AudioSegment
+import subprocess
+from itertools import count
+import numpy as np
+from moviepy.config import get_setting
+from Transcription.chunk_manifest import AudioChunk, ChunkManifest
 
 logger = logging.getLogger(__name__)
 
 
 class AudioSplitter:
-    def __init__(self, audio_input_path, audio_output_path, segment_length=20):
+    def __init__(self, audio_input_path, audio_output_path, segment_length=20, sample_rate=16000):
         self.audio_input_path = audio_input_path
         self.audio_output_path = audio_output_path
         self.segment_length = segment_length
+        self.sample_rate = sample_rate
 
-    def split_audio(self):
-        audio = AudioSegment.from_file(self.audio_input_path)
-        chunk_length_ms = self.segment_length * 1000
-        total_duration_ms = len(audio)
+    def _pcm_command(self):
+        """ffmpeg command that decodes the first audio stream to raw mono s16le on stdout."""
+        return [
+            get_setting("FFMPEG_BINARY"),
+            "-hide_banner", "-loglevel", "error",
+            "-i", self.audio_input_path,
+            "-map", "0:a:0", "-vn",
+            "-ac", "1",
+            "-ar", str(self.sample_rate),
+            "-f", "s16le",
+            "-c:a", "pcm_s16le",
+            "-",
+        ]
+
+    def decode_audio(self):
+        """
+        Decodes the whole audio stream once into a float32 buffer in [-1, 1].
+
+        Returns:
+            np.ndarray: Mono samples at `sample_rate`.
+        """
+        result = subprocess.run(self._pcm_command(), capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"ffmpeg audio decode failed: {result.stderr.decode(errors='replace').strip()}")
+        pcm = np.frombuffer(result.stdout, dtype=np.int16)
+        return pcm.astype(np.float32) / 32768.0
+
+    def split_audio_in_memory(self):
+        """
+        Splits the audio into fixed-length chunks without touching the disk.
 
+        Every chunk's array is a NumPy view over one shared decoded buffer.
+
+        Returns:
+            ChunkManifest: In-memory chunks in playback order.
+        """
+        audio = self.decode_audio()
+        chunk_samples = self.segment_length * self.sample_rate
         chunks = []
-        for i in range(0, total_duration_ms, chunk_length_ms):
-            end = min(i + chunk_length_ms, total_duration_ms)
-            chunks.append(audio[i:end])
-
-        chunk_paths = []
-        for idx, chunk in enumerate(chunks):
-            path = os.path.join(self.audio_output_path, f"chunk_{idx}.wav")
-            chunk.export(path, format="wav")
-            chunk_paths.append(path)
+        for chunk_id, start in enumerate(range(0, len(audio), chunk_samples), start=1):
+            chunks.append(AudioChunk.from_array(
+                chunk_id, start, audio[start:start + chunk_samples], self.sample_rate))
+        logger.info(
+            f"Decoded {len(audio) / self.sample_rate:.2f}s of audio into {len(chunks)} in-memory chunks")
+        return ChunkManifest(chunks=chunks, sample_rate=self.sample_rate)
+
+    def _iter_pcm_blocks(self, block_samples):
+        """
+        Reads the decoded PCM stream from ffmpeg in blocks of `block_samples`.
+
+        Yields:
+            np.ndarray: float32 mono samples in [-1, 1]; the last block may be shorter.
+        """
+        process = subprocess.Popen(
+            self._pcm_command(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            while True:
+                data = process.stdout.read(block_samples * 2)
+                if len(data) < 2:
+                    break
+                pcm = np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16)
+                yield pcm.astype(np.float32) / 32768.0
+            if process.wait() != 0:
+                raise RuntimeError(
+                    f"ffmpeg audio decode failed: {process.stderr.read().decode(errors='replace').strip()}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            process.stderr.close()
+            process.wait()
+
+    def iter_chunks(self):
+        """
+        Streams fixed-length chunks from an ffmpeg pipe, one window at a time.
+
+        Only the current window is held in memory, so peak usage stays constant
+        regardless of recording length. Every chunk holds exactly
+        `segment_length * sample_rate` samples (the last one may be shorter). This
+        differs from `split_audio`, whose segment muxer cuts at packet boundaries,
+        so the two modes produce slightly different chunks and never share a
+        transcript cache entry (the chunk mode is part of the key).
+
+        Yields:
+            AudioChunk: In-memory chunks in playback order.
+        """
+        sample_offset = 0
+        blocks = self._iter_pcm_blocks(self.segment_length * self.sample_rate)
+        for chunk_id, block in enumerate(blocks, start=1):
+            yield AudioChunk.from_array(chunk_id, sample_offset, block, self.sample_rate)
+            sample_offset += len(block)
+        logger.info(f"Streamed {sample_offset / self.sample_rate:.2f}s of audio")
+
+    def iter_voice_chunks(self, frame_ms=30, energy_threshold_db=-40.0, min_silence_ms=600,
+                          speech_pad_ms=200, min_speech_ms=250):
+        """
+        Streams speech-only chunks whose boundaries fall in pauses.
+
+        Frames are classified as speech when their RMS energy exceeds
+        `energy_threshold_db` (dBFS). A chunk closes after `min_silence_ms` of
+        silence, keeping `speech_pad_ms` around the speech; silence between chunks
+        is dropped. Chunks never exceed `segment_length`: an over-long chunk is cut
+        at the quietest frame of its last third. Memory stays bounded by one chunk.
+
+        Parameters:
+        - frame_ms: Analysis frame length in milliseconds.
+        - energy_threshold_db: Frame energy above which a frame counts as speech.
+        - min_silence_ms: Pause length that ends a chunk.
+        - speech_pad_ms: Audio kept before and after each speech region.
+        - min_speech_ms: Chunks with less speech than this are dropped as noise.
+
+        Yields:
+            AudioChunk: In-memory speech chunks with their true sample offsets.
+        """
+        frame_len = self.sample_rate * frame_ms // 1000
+        max_frames = self.segment_length * 1000 // frame_ms
+        min_silence_frames = max(1, min_silence_ms // frame_ms)
+        pad_frames = min(speech_pad_ms // frame_ms, min_silence_frames - 1)
+        min_speech_frames = max(1, min_speech_ms // frame_ms)
+
+        # Rolling buffer of samples and frame energies starting at frame `buf_frame`
+        buf = np.zeros(0, dtype=np.float32)
+        buf_db = np.zeros(0, dtype=np.float32)
+        buf_frame = 0
+        remainder = np.zeros(0, dtype=np.float32)
+
+        frame = 0
+        chunk_start = None
+        last_speech = None
+        last_end = 0
+        speech_frames = 0
+        kept_frames = 0
+        chunk_ids = count(1)
+
+        def record(start, end):
+            return AudioChunk.from_array(
+                next(chunk_ids),
+                start * frame_len,
+                buf[(start - buf_frame) * frame_len:(end - buf_frame) * frame_len],
+                self.sample_rate)
+
+        for block in self._iter_pcm_blocks(max_frames * frame_len):
+            samples = np.concatenate([remainder, block])
+            n_new = len(samples) // frame_len
+            remainder = samples[n_new * frame_len:]
+            frames = samples[:n_new * frame_len]
+            rms = np.sqrt(np.mean(frames.reshape(n_new, frame_len) ** 2, axis=1))
+            buf = np.concatenate([buf, frames])
+            buf_db = np.concatenate(
+                [buf_db, 20 * np.log10(np.maximum(rms, 1e-10))])
+
+            for _ in range(n_new):
+                is_speech = buf_db[frame - buf_frame] > energy_threshold_db
+                if chunk_start is None:
+                    if is_speech:
+                        chunk_start = max(frame - pad_frames, buf_frame, last_end)
+                        last_speech = frame
+                        speech_frames = 1
+                elif is_speech:
+                    last_speech = frame
+                    speech_frames += 1
+                elif frame - last_speech >= min_silence_frames:
+                    end = last_speech + 1 + pad_frames
+                    if speech_frames >= min_speech_frames:
+                        kept_frames += end - chunk_start
+                        yield record(chunk_start, end)
+                    last_end = end
+                    chunk_start = None
+
+                if chunk_start is not None and frame + 1 - chunk_start >= max_frames:
+                    # No pause in time: cut at the quietest frame of the last third
+                    search_from = chunk_start + max_frames * 2 // 3
+                    cut = search_from + int(np.argmin(
+                        buf_db[search_from - buf_frame:frame + 1 - buf_frame]))
+                    kept_frames += cut - chunk_start
+                    yield record(chunk_start, cut)
+                    last_end = cut
+                    chunk_start = cut
+                    speech_frames = int(np.count_nonzero(
+                        buf_db[cut - buf_frame:frame + 1 - buf_frame] > energy_threshold_db))
+                frame += 1
+
+            keep_from = chunk_start if chunk_start is not None else max(
+                frame - pad_frames, buf_frame)
+            buf = buf[(keep_from - buf_frame) * frame_len:]
+            buf_db = buf_db[keep_from - buf_frame:]
+            buf_frame = keep_from
+
+        if chunk_start is not None and speech_frames >= min_speech_frames:
+            end = min(last_speech + 1 + pad_frames, frame)
+            kept_frames += end - chunk_start
+            yield record(chunk_start, end)
+
+        logger.info(
+            f"Voice activity kept {kept_frames * frame_ms / 1000:.2f}s of {frame * frame_ms / 1000:.2f}s of audio")
+
+    def split_audio(self):
+        """
+        Splits the audio stream of the input file into fixed-length mono WAV chunks.
+
+        The input can be a video or an audio file. ffmpeg pulls only the first
+        audio stream, resamples it to `sample_rate` mono once and writes
+        `chunk_N.wav` files with the segment muxer, all in a single decode pass.
+
+        Returns:
+            ChunkManifest: Chunk files in playback order, with exact sample offsets.
+        """
+        segment_list_path = os.path.join(
+            self.audio_output_path, "chunks.txt")
+        command = [
+            get_setting("FFMPEG_BINARY"),
+            "-hide_banner", "-loglevel", "error", "-y",
+            "-i", self.audio_input_path,
+            "-map", "0:a:0", "-vn",
+            "-ac", "1",
+            "-ar", str(self.sample_rate),
+            "-c:a", "pcm_s16le",
+            "-f", "segment",
+            "-segment_time", str(self.segment_length),
+            "-segment_list", segment_list_path,
+            "-segment_list_type", "flat",
+            "-reset_timestamps", "1",
+            os.path.join(self.audio_output_path, "chunk_%d.wav"),
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"ffmpeg audio ingest failed: {result.stderr.strip()}")
+
+        with open(segment_list_path, "r") as f:
+            chunk_paths = [os.path.join(self.audio_output_path, line.strip())
+                           for line in f if line.strip()]
+        os.remove(segment_list_path)
+
+        for path in chunk_paths:
             logger.info(f"Exported chunk: {path}")
 
-        return chunk_paths
+        return ChunkManifest.from_wav_paths(chunk_paths, self.sample_rate)
@@ -1,37 +1,14 @@
-import torch
-from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
-from pydub import AudioSegment
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from Transcription.model_registry import DEFAULT_MODEL_ID, registry
 import logging
+import multiprocessing
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
-# Initialize model ONCE at module-level to avoid repeated loading
-device = "cuda" if torch.cuda.is_available() else "cpu"
-logger.info(f"Using device: {device}")
-torch_dtype = torch.float16 if device == "cuda" else torch.float32
-
-model_id = "Oriserve/Whisper-Hindi2Hinglish-Swift"
-
-model = AutoModelForSpeechSeq2Seq.from_pretrained(
-    model_id,
-    torch_dtype=torch_dtype,
-    low_cpu_mem_usage=True,
-    use_safetensors=True
-).to(device)
-
-processor = AutoProcessor.from_pretrained(model_id)
-
-asr_pipe = pipeline(
-    "automatic-speech-recognition",
-    model=model,
-    tokenizer=processor.tokenizer,
-    feature_extractor=processor.feature_extractor,
-    torch_dtype=torch_dtype,
-    device=device,
-    return_timestamps=True,
-    generate_kwargs={"task": "transcribe"}
-)
-
 
 def seconds_to_hms(seconds):
     """Convert seconds to hours:minutes:seconds format"""
@@ -41,54 +18,175 @@ def seconds_to_hms(seconds):
     return f"{hours:02d}:{minutes:02d}:{seconds:05.2f}"
 
 
-def transcribe_audio_chunks(audio_chunk_paths, audio_chunk_duration=20):
+def _segments_from_result(result, chunk_id, chunk_start_time, chunk_end_time):
+    """Shifts the pipeline's chunk-relative segments onto the recording timeline."""
+    segments = []
+    for segment in result.get('chunks', []):
+        seg_start, seg_end = segment.get('timestamp', (None, None))
+
+        if seg_start is not None and seg_end is not None:
+            adjusted_start = min(
+                seg_start + chunk_start_time, chunk_end_time)
+            adjusted_end = min(
+                seg_end + chunk_start_time, chunk_end_time)
+        else:
+            adjusted_start, adjusted_end = chunk_start_time, chunk_end_time
+
+        segments.append({
+            'chunk_id': chunk_id,
+            'start': seconds_to_hms(adjusted_start),
+            'end': seconds_to_hms(adjusted_end),
+            'text': segment['text'].strip()
+        })
+    return segments
+
+
+def _iter_batches(audio_chunks, batch_size):
+    """
+    Groups AudioChunks into batches of `batch_size`.
+
+    Yields:
+        List[AudioChunk]: The next batch, in chunk order.
+    """
+    chunk_count = f"/{len(audio_chunks)}" if hasattr(audio_chunks,
+                                                     "__len__") else ""
+    chunk_iter = iter(audio_chunks)
+
+    while True:
+        batch = list(islice(chunk_iter, batch_size))
+        if not batch:
+            return
+        for chunk in batch:
+            logger.info(
+                f"Transcribing chunk {chunk.chunk_id}{chunk_count}: {chunk.path or 'in-memory'} @ {chunk.offset:.2f}s")
+        yield batch
+
+
+# Per-process pipeline used by the worker pool, set once by _init_worker
+_worker_asr_pipe = None
+
+
+def _init_worker(model_id, device, dtype, backend, threads_per_worker):
+    global _worker_asr_pipe
+    import torch
+    # Each worker gets its own slice of the cores so workers don't oversubscribe
+    torch.set_num_threads(threads_per_worker)
+    _worker_asr_pipe = registry.get(model_id, device, dtype, backend)
+
+
+def _run_worker_batch(inputs, batch_size):
+    return _worker_asr_pipe(inputs, batch_size=batch_size)
+
+
+def _iter_pool_results(batches, batch_size, num_workers, threads_per_worker, model_id, device, dtype,
+                       backend):
+    """
+    Fans batches out to a process pool and yields (batch, results) in chunk order.
+
+    At most two batches per worker are in flight, so lazy chunk streams stay bounded.
+    """
+    logger.info(
+        f"Transcribing with {num_workers} worker processes x {threads_per_worker} threads")
+    pending = deque()
+    with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_id, device, dtype, backend, threads_per_worker)) as pool:
+        for batch in batches:
+            inputs = [chunk.pipeline_input() for chunk in batch]
+            pending.append(
+                (batch, pool.submit(_run_worker_batch, inputs, batch_size)))
+            if len(pending) >= num_workers * 2:
+                done_batch, future = pending.popleft()
+                yield done_batch, future.result()
+        while pending:
+            done_batch, future = pending.popleft()
+            yield done_batch, future.result()
+
+
+def iter_transcribed_segments(audio_chunks, batch_size=8,
+                              model_id=DEFAULT_MODEL_ID, device=None, dtype=None, backend="pytorch",
+                              num_workers=1, threads_per_worker=None, on_chunk_done=None):
+    """
+    Generator form of transcribe_audio_chunks: yields each timestamped segment
+    as soon as its batch is transcribed, so downstream stages can start on the
+    first chunks while later ones are still in the model.
+
+    Args:
+        Same as transcribe_audio_chunks.
+
+    Yields:
+        dict: Segment with 'chunk_id', 'start', 'end' and 'text', in chunk order.
+    """
+    audio_seconds = 0.0
+    started = time.perf_counter()
+    batches = _iter_batches(audio_chunks, batch_size)
+
+    if num_workers > 1:
+        threads_per_worker = threads_per_worker or max(
+            1, (os.cpu_count() or 1) // num_workers)
+        batch_results = _iter_pool_results(
+            batches, batch_size, num_workers, threads_per_worker, model_id, device, dtype,
+            backend)
+    else:
+        asr_pipe = registry.get(model_id, device, dtype, backend)
+        batch_results = (
+            (batch, asr_pipe([chunk.pipeline_input() for chunk in batch],
+                             batch_size=batch_size))
+            for batch in batches)
+
+    for batch, results in batch_results:
+        for chunk, result in zip(batch, results):
+            segments = _segments_from_result(
+                result, chunk.chunk_id, chunk.offset, chunk.end)
+            audio_seconds += chunk.duration
+            if on_chunk_done is not None:
+                on_chunk_done(chunk, segments)
+            yield from segments
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Transcribed {audio_seconds:.2f}s of audio in {elapsed:.2f}s "
+        f"({audio_seconds / max(elapsed, 1e-9):.2f} audio-seconds per wall-second, batch_size={batch_size})")
+
+
+def transcribe_audio_chunks(audio_chunks, batch_size=8,
+                            model_id=DEFAULT_MODEL_ID, device=None, dtype=None, backend="pytorch",
+                            num_workers=1, threads_per_worker=None, on_chunk_done=None):
     """
     Transcribe multiple audio chunks clearly and return a structured transcript.
 
+    Chunks are fed to the model `batch_size` at a time so every forward pass
+    covers several chunks; throughput is logged as audio-seconds per wall-second.
+    With `num_workers` > 1 the batches are sharded across worker processes, each
+    holding its own model, and reassembled in chunk order. Batches are formed the
+    same way in both paths, so the output is identical to the serial run.
+
     Args:
-        audio_chunk_paths (List[str]): List of audio chunk file paths.
-        audio_chunk_duration (int): Duration (seconds) of each audio chunk.
+        audio_chunks (ChunkManifest | Iterable[AudioChunk]): Chunks from the
+            splitter, either a manifest or a lazy stream. Each chunk carries its
+            own sample offset and count.
+        batch_size (int): Number of chunks per model forward pass.
+        model_id (str): Hugging Face model id, loaded lazily through the registry.
+        device (str): "cuda" or "cpu"; auto-detected when None.
+        dtype (str): "float16" or "float32"; picked from the device when None.
+        backend (str): "pytorch", or the CPU backends "int8" (dynamic quantization)
+            and "onnx" (ONNX Runtime export).
+        num_workers (int): Number of transcription processes; 1 runs in-process.
+        threads_per_worker (int): torch threads per worker process; defaults to
+            an even split of the available cores.
+        on_chunk_done (Callable): Called as on_chunk_done(chunk, segments) after
+            each chunk, in chunk order; used to checkpoint progress.
 
     Returns:
         List[dict]: A structured list of transcripts with timestamps.
     """
     try:
-        full_transcript = []
-
-        # Calculate total duration (in seconds) for safety
-        total_duration_sec = sum(AudioSegment.from_file(
-            p).duration_seconds for p in audio_chunk_paths)
-
-        for idx, chunk_path in enumerate(audio_chunk_paths):
-            logger.info(
-                f"Transcribing chunk {idx + 1}/{len(audio_chunk_paths)}: {chunk_path}")
-
-            result = asr_pipe(chunk_path)
-
-            # Calculate chunk start/end boundaries
-            chunk_start_time = idx * audio_chunk_duration
-            chunk_end_time = min(
-                (idx + 1) * audio_chunk_duration, total_duration_sec)
-
-            for segment in result.get('chunks', []):
-                seg_start, seg_end = segment.get('timestamp', (None, None))
-
-                if seg_start is not None and seg_end is not None:
-                    adjusted_start = min(
-                        seg_start + chunk_start_time, total_duration_sec)
-                    adjusted_end = min(
-                        seg_end + chunk_start_time, total_duration_sec)
-                else:
-                    adjusted_start, adjusted_end = chunk_start_time, chunk_end_time
-
-                full_transcript.append({
-                    'chunk_id': idx + 1,
-                    'start': seconds_to_hms(adjusted_start),
-                    'end': seconds_to_hms(adjusted_end),
-                    'text': segment['text'].strip()
-                })
-
-        return full_transcript
+        return list(iter_transcribed_segments(
+            audio_chunks, batch_size=batch_size, model_id=model_id, device=device, dtype=dtype,
+            backend=backend, num_workers=num_workers, threads_per_worker=threads_per_worker,
+            on_chunk_done=on_chunk_done))
 
     except Exception as e:
         logger.error(f"Transcription failed: {e}")
@@ -0,0 +1,105 @@
+"""
+Compares the CPU ASR backends against the fp32 PyTorch baseline on a fixture clip.
+
+Usage (from the ML directory):
+    python -m Transcription.backend_benchmark data/fixtures/asr_fixture.wav
+
+For every backend it reports the real-time factor (processing seconds per audio
+second, lower is faster) and the word error rate of its transcript against the
+fp32 transcript.
+"""
+import argparse
+import logging
+import time
+from Transcription.audio_splitter import AudioSplitter
+from Transcription.audio_transcriber import transcribe_audio_chunks
+from Transcription.model_registry import BACKENDS, DEFAULT_MODEL_ID, registry
+from utility import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word-level Levenshtein distance between two transcripts, normalised by the reference length.
+
+    Parameters:
+    - reference: Reference transcript text.
+    - hypothesis: Transcript text to score.
+
+    Returns:
+    - WER as a float (0.0 means identical word sequences).
+    """
+    ref_words = reference.lower().split()
+    hyp_words = hypothesis.lower().split()
+    if not ref_words:
+        return 0.0 if not hyp_words else 1.0
+
+    previous = list(range(len(hyp_words) + 1))
+    for i, ref_word in enumerate(ref_words, start=1):
+        current = [i] + [0] * len(hyp_words)
+        for j, hyp_word in enumerate(hyp_words, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref_words)
+
+
+def benchmark_backends(clip_path, backends=BACKENDS, model_id=DEFAULT_MODEL_ID, segment_length=20,
+                       batch_size=8):
+    """
+    Transcribes the clip with each backend and scores it against the "pytorch" fp32 run.
+
+    Parameters:
+    - clip_path: Audio or video file used as the fixture.
+    - backends: Backends to compare; "pytorch" is always run first as the baseline.
+    - model_id: ASR model to load for every backend.
+    - segment_length: Chunk length in seconds.
+    - batch_size: Chunks per forward pass.
+
+    Returns:
+    - List of dicts with backend, rtf and wer.
+    """
+    chunks = AudioSplitter(clip_path, None, segment_length).split_audio_in_memory()
+    audio_seconds = chunks.duration
+
+    results = []
+    baseline_text = None
+    for backend in ["pytorch"] + [b for b in backends if b != "pytorch"]:
+        # Load and warm up outside the timed region so RTF measures inference only
+        registry.warm_up(model_id, device="cpu", dtype="float32", backend=backend)
+        started = time.perf_counter()
+        transcript = transcribe_audio_chunks(
+            chunks, batch_size=batch_size, model_id=model_id, device="cpu",
+            dtype="float32", backend=backend)
+        elapsed = time.perf_counter() - started
+
+        text = " ".join(segment["text"] for segment in transcript)
+        if baseline_text is None:
+            baseline_text = text
+        results.append({
+            "backend": backend,
+            "rtf": elapsed / audio_seconds,
+            "wer": word_error_rate(baseline_text, text)
+        })
+    return results
+
+
+if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(
+        description="Compare CPU ASR backends against the fp32 baseline.")
+    parser.add_argument("clip_path", help="Fixture audio or video clip")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS),
+                        choices=BACKENDS)
+    parser.add_argument("--model-id", default=DEFAULT_MODEL_ID)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    for row in benchmark_backends(args.clip_path, args.backends, args.model_id,
+                                  batch_size=args.batch_size):
+        logger.info(
+            f"{row['backend']:>8} | RTF {row['rtf']:.3f} | WER vs fp32 {row['wer']:.2%}")
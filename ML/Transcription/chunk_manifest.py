@@ -0,0 +1,101 @@
+import wave
+from dataclasses import dataclass, field
+from typing import List, Optional
+import numpy as np
+
+
+@dataclass
+class AudioChunk:
+    """
+    One ASR chunk with its exact position on the recording timeline.
+
+    The audio lives either on disk (`path`) or in memory (`array`, float32 mono).
+    """
+    chunk_id: int
+    sample_offset: int
+    sample_count: int
+    sample_rate: int
+    path: Optional[str] = None
+    array: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def offset(self):
+        """Start time in seconds."""
+        return self.sample_offset / self.sample_rate
+
+    @property
+    def duration(self):
+        """Length in seconds."""
+        return self.sample_count / self.sample_rate
+
+    @property
+    def end(self):
+        """End time in seconds."""
+        return (self.sample_offset + self.sample_count) / self.sample_rate
+
+    def pipeline_input(self):
+        """Input for the Hugging Face ASR pipeline: a fresh dict for in-memory audio, else the path."""
+        if self.array is not None:
+            return {"array": self.array, "sampling_rate": self.sample_rate}
+        return self.path
+
+    @classmethod
+    def from_array(cls, chunk_id, sample_offset, array, sample_rate):
+        return cls(
+            chunk_id=chunk_id,
+            sample_offset=sample_offset,
+            sample_count=len(array),
+            sample_rate=sample_rate,
+            array=array
+        )
+
+    @classmethod
+    def from_wav(cls, chunk_id, sample_offset, path):
+        """Reads the sample rate and sample count from a WAV chunk's header, without reading its samples."""
+        with wave.open(path, "rb") as wav:
+            sample_rate = wav.getframerate()
+            sample_count = wav.getnframes()
+        return cls(
+            chunk_id=chunk_id,
+            sample_offset=sample_offset,
+            sample_count=sample_count,
+            sample_rate=sample_rate,
+            path=path
+        )
+
+
+@dataclass
+class ChunkManifest:
+    """
+    Ordered list of AudioChunks covering one recording.
+
+    This is the unit every stage after the splitter consumes: offsets and
+    durations come from sample counts, never from re-decoding chunk files.
+    """
+    chunks: List[AudioChunk]
+    sample_rate: int
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def __getitem__(self, index):
+        return self.chunks[index]
+
+    @property
+    def duration(self):
+        """Total seconds of audio held by the chunks."""
+        return sum(chunk.sample_count for chunk in self.chunks) / self.sample_rate
+
+    @classmethod
+    def from_wav_paths(cls, paths, sample_rate):
+        """Builds a manifest for contiguous WAV chunk files listed in playback order."""
+        chunks = []
+        sample_offset = 0
+        for chunk_id, path in enumerate(paths, start=1):
+            chunk = AudioChunk.from_wav(chunk_id, sample_offset, path)
+            chunks.append(chunk)
+            sample_offset += chunk.sample_count
+        return cls(chunks=chunks, sample_rate=sample_rate)
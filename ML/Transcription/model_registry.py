@@ -0,0 +1,160 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_ID = "Oriserve/Whisper-Hindi2Hinglish-Swift"
+
+# "pytorch" runs the model as-is; "int8" and "onnx" are CPU-only backends
+BACKENDS = ("pytorch", "int8", "onnx")
+
+# ONNX exports of each model, written on first use and loaded from here afterwards
+ONNX_CACHE_DIR = "data/cache/onnx"
+
+
+class ASRModelRegistry:
+    """
+    Loads ASR pipelines on first use and reuses them across calls.
+
+    Entries are keyed by (model_id, device, dtype, backend). torch and transformers are
+    imported only when a model is actually loaded, so importing this module (or
+    anything that imports the transcriber) stays cheap.
+    """
+
+    def __init__(self, onnx_cache_dir=ONNX_CACHE_DIR):
+        self.onnx_cache_dir = onnx_cache_dir
+        self._pipelines = {}
+        self._load_seconds = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def resolve(device=None, dtype=None, backend="pytorch"):
+        """
+        Fills in the default device and dtype, and validates the backend.
+
+        Returns:
+        - (device, dtype, backend) where device is "cuda" or "cpu" and dtype is "float16" or "float32".
+        """
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown ASR backend '{backend}'. Expected one of {BACKENDS}.")
+        if backend != "pytorch":
+            if device not in (None, "cpu"):
+                raise ValueError(
+                    f"ASR backend '{backend}' only runs on cpu, got device '{device}'.")
+            return "cpu", "float32", backend
+        if device is None:
+            import torch
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        if dtype is None:
+            dtype = "float16" if device.startswith("cuda") else "float32"
+        return device, dtype, backend
+
+    def get(self, model_id=DEFAULT_MODEL_ID, device=None, dtype=None, backend="pytorch"):
+        """
+        Returns the ASR pipeline for the given configuration, loading it if needed.
+        """
+        key = (model_id, *self.resolve(device, dtype, backend))
+        with self._lock:
+            if key not in self._pipelines:
+                self._pipelines[key] = self._load(*key)
+            return self._pipelines[key]
+
+    def _load(self, model_id, device, dtype, backend):
+        import torch
+        from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
+
+        logger.info(
+            f"Loading ASR model {model_id} on {device} ({dtype}, {backend} backend)...")
+        started = time.perf_counter()
+        torch_dtype = getattr(torch, dtype)
+
+        if backend == "onnx":
+            try:
+                from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+            except ImportError as e:
+                raise ImportError(
+                    "The onnx ASR backend needs optimum[onnxruntime]. Install it with "
+                    "`pip install optimum[onnxruntime]`.") from e
+            model = self._load_onnx(ORTModelForSpeechSeq2Seq, model_id)
+        else:
+            model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                model_id,
+                torch_dtype=torch_dtype,
+                low_cpu_mem_usage=True,
+                use_safetensors=True
+            ).to(device)
+            if backend == "int8":
+                # Dynamic quantization: int8 weights for every Linear, activations quantized on the fly
+                model = torch.ao.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        processor = AutoProcessor.from_pretrained(model_id)
+
+        asr_pipe = pipeline(
+            "automatic-speech-recognition",
+            model=model,
+            tokenizer=processor.tokenizer,
+            feature_extractor=processor.feature_extractor,
+            torch_dtype=torch_dtype,
+            device=device,
+            return_timestamps=True,
+            generate_kwargs={"task": "transcribe"}
+        )
+
+        load_seconds = time.perf_counter() - started
+        self._load_seconds[(model_id, device, dtype, backend)] = load_seconds
+        logger.info(f"Loaded ASR model {model_id} in {load_seconds:.2f}s")
+        return asr_pipe
+
+    def _load_onnx(self, model_class, model_id):
+        """
+        Loads the ONNX export of `model_id` from the cache directory, exporting the
+        encoder/decoder graphs once if they are not there yet.
+        """
+        export_dir = os.path.join(self.onnx_cache_dir, model_id.replace("/", "--"))
+        if os.path.isdir(export_dir):
+            return model_class.from_pretrained(export_dir)
+        logger.info(f"Exporting {model_id} to ONNX (once) into {export_dir}")
+        model = model_class.from_pretrained(model_id, export=True)
+        os.makedirs(self.onnx_cache_dir, exist_ok=True)
+        # Export next to the target and rename, so a concurrent worker never sees a partial export
+        temp_dir = tempfile.mkdtemp(dir=self.onnx_cache_dir)
+        try:
+            model.save_pretrained(temp_dir)
+            os.rename(temp_dir, export_dir)
+        except OSError:
+            # Another process finished the same export first
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        return model
+
+    def warm_up(self, model_id=DEFAULT_MODEL_ID, device=None, dtype=None, backend="pytorch",
+                sampling_rate=16000):
+        """
+        Loads the model (if needed) and runs one inference on a second of silence,
+        so the first real request does not pay for lazy kernel initialisation.
+
+        Returns:
+        - Seconds spent on the warm-up inference.
+        """
+        import numpy as np
+
+        asr_pipe = self.get(model_id, device, dtype, backend)
+        started = time.perf_counter()
+        asr_pipe({"array": np.zeros(sampling_rate, dtype=np.float32),
+                  "sampling_rate": sampling_rate})
+        warm_up_seconds = time.perf_counter() - started
+        logger.info(
+            f"Warm-up inference for {model_id} took {warm_up_seconds:.2f}s")
+        return warm_up_seconds
+
+    def load_times(self):
+        """Returns {(model_id, device, dtype, backend): load seconds} for every loaded model."""
+        return dict(self._load_seconds)
+
+
+registry = ASRModelRegistry()
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptCache:
+    """
+    Persistent, content-addressed store of chunk transcripts.
+
+    Each entry is one JSON file named by its key. Reads refresh the file's mtime,
+    so evicting the oldest mtimes first gives LRU order once the total size
+    exceeds `max_bytes`.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(audio_hash, **settings):
+        """
+        Builds the cache key from the audio content hash and every setting that changes the transcript.
+
+        Parameters:
+        - audio_hash: Content hash of the lecture video file (file_content_hash).
+        - settings: ASR and chunking settings (model id, backend, dtype, chunk mode, ...).
+
+        Returns:
+        - Hex digest usable as a file name.
+        """
+        payload = json.dumps({"audio": audio_hash, **settings}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Returns the cached chunk transcripts for `key`, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                chunk_transcripts = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (IOError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable transcript cache entry {path}: {e}")
+            return None
+        os.utime(path)
+        return chunk_transcripts
+
+    def put(self, key, chunk_transcripts):
+        """Stores the chunk transcripts under `key`, then evicts least recently used entries over the cap."""
+        path = self._path(key)
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(chunk_transcripts, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except IOError as e:
+            logger.error(f"Failed to write transcript cache entry: {e}")
+            raise
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total_bytes -= size
+            logger.info(f"Evicted transcript cache entry {name}")
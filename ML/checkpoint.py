@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressLog:
+    """
+    Append-only JSONL log of finished work items inside a long stage.
+
+    Every append is flushed and fsynced, so a run killed mid-stage (e.g. on a
+    preempted node) resumes after the last item that was written. A torn last
+    line from a kill mid-write is dropped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.items = {}
+        if os.path.exists(path):
+            with open(path, "rb+") as f:
+                data = f.read()
+                # Drop a torn last line so the next append starts on a fresh line
+                complete = data[:data.rfind(b"\n") + 1]
+                if len(complete) != len(data):
+                    f.truncate(len(complete))
+            for line in complete.decode("utf-8").splitlines():
+                entry = json.loads(line)
+                self.items[entry["id"]] = entry["result"]
+            logger.info(
+                f"Resuming from {len(self.items)} completed items in {path}")
+
+    def __contains__(self, item_id):
+        return item_id in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, item_id):
+        return self.items.get(item_id)
+
+    def append(self, item_id, result):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": item_id, "result": result},
+                    ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.items[item_id] = result
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.items = {}
+
+
+class RunManifest:
+    """
+    Records which pipeline stages have completed, keyed by a hash of their inputs and config.
+
+    A stage is skipped on restart when its recorded key matches and its output
+    files still exist; otherwise it runs again, resuming from its ProgressLog.
+    """
+
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.stages = {}
+        # Concurrent DAG stages may complete at the same time
+        self._lock = threading.Lock()
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    self.stages = json.load(f).get("stages", {})
+            except (IOError, ValueError) as e:
+                logger.warning(
+                    f"Ignoring unreadable run manifest {manifest_path}: {e}")
+
+    @staticmethod
+    def make_key(*parts):
+        """Stable hash of JSON-serialisable stage inputs (file hashes, config values, upstream keys)."""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_complete(self, stage, key):
+        entry = self.stages.get(stage)
+        return (
+            entry is not None
+            and entry["key"] == key
+            and all(os.path.exists(path) for path in entry["outputs"])
+        )
+
+    def mark_complete(self, stage, key, outputs):
+        with self._lock:
+            self.stages[stage] = {"key": key, "outputs": list(outputs)}
+            temp_path = f"{self.manifest_path}.tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"stages": self.stages}, f, indent=2)
+                os.replace(temp_path, self.manifest_path)
+            except IOError as e:
+                logger.error(f"Failed to save run manifest: {e}")
+                raise
+
+    def progress(self, stage, key):
+        """ProgressLog for the given stage run; a changed key starts a fresh log."""
+        progress_dir = os.path.join(
+            os.path.dirname(self.manifest_path), ".progress")
+        return ProgressLog(os.path.join(progress_dir, f"{stage}-{key[:16]}.jsonl"))
+
+    def run_stage(self, stage, key, outputs, compute, load):
+        """
+        Runs a stage unless it already completed with the same key.
+
+        Parameters:
+        - stage: Stage name.
+        - key: Hash of the stage inputs and config (see make_key).
+        - outputs: Files the stage writes; all must exist for the stage to count as done.
+        - compute: Callable that runs the stage and returns its result.
+        - load: Callable that rebuilds the result from the output files.
+
+        Returns:
+        - The stage result, computed or loaded.
+        """
+        if self.is_complete(stage, key):
+            logger.info(f"Stage '{stage}' already completed. Loading {outputs}")
+            return load()
+        result = compute()
+        self.mark_complete(stage, key, outputs)
+        self.progress(stage, key).clear()
+        return result
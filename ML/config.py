@@ -45,7 +45,6 @@ def download_cloudinary_video(video_url: str, output_path: str = "downloaded_vid
 # Define all paths clearly
 video_path = "data/test_01/eng_01.mp4"
 audio_output_path = "data/test_01/chunks"
-audio_input_path = "data/test_01/eng_01_extracted_audio.wav"
 transcript_output_path = "data/test_01/eng_01_transcription.json"
 ppt_path = "data/test_01/eng_01.pptx"
 final_topic_path = "data/test_01/eng_01_final_topics.json"
@@ -59,9 +58,91 @@ temperature = 0.3
 base_url = "https://api.groq.com/openai/v1"
 MAX_REQUESTS_PER_MINUTE = 30
 MAX_TOKENS_PER_MINUTE = 6000
+TOPIC_EXTRACTION_CONCURRENCY = 8  # slide-window topic requests in flight
+# Larger sub-topic lists are reduced in groups first; keeps the final prompt
+# well inside the model context (8192 tokens for llama3-70b-8192)
+TOPIC_REDUCE_MAX_PROMPT_TOKENS = 4000
+# Near-duplicate sub-topics are merged locally before the reduce step
+USE_TOPIC_DEDUP = True
+TOPIC_DEDUP_THRESHOLD = 0.85  # lowest character n-gram cosine similarity to merge two names
+TOPIC_DEDUP_NGRAM = 3  # character n-gram length
+# Output token budget per call type; the limiter reserves prompt tokens plus this.
+# Batch tagging gets topic_tagging tokens per segment.
+LLM_MAX_TOKENS = {
+    "topic_tagging": 64,
+    "compact_topic_tagging": 16,
+    "all_topics": 300,
+    "final_topics": 400,
+}
+# Token buckets shared by every LLM caller: "local" (one process), "file" (one host)
+# or "redis" (every Celery worker on REDIS_URL)
+RATE_LIMIT_BACKEND = "file"
+RATE_LIMIT_STATE_PATH = "data/cache/llm_rate_limit.json"
+REDIS_URL = os.getenv("REDIS_URL")
+# Completions cached by model, endpoint, temperature, max tokens and prompts
+USE_LLM_CACHE = True  # set False to always call the LLM
+LLM_CACHE_PATH = "data/cache/llm_responses.sqlite3"
+LLM_CACHE_TTL_SECONDS = 30 * 24 * 3600
+LLM_CACHE_MAX_BYTES = 200 * 1024 * 1024  # LRU eviction beyond this size
+TAGGING_CONCURRENCY = 8  # tagging requests in flight; 1 uses the sequential Caller
+# "compact": numbered topics in a stable system prompt and one-line ID answers;
+# "full": topic names in every user prompt and four-field answers
+TAGGING_PROMPT_MODE = "compact"
+TAGGING_BATCH_SIZE = 8  # transcript segments per tagging request; 1 tags one at a time
+# Rule-based prefilter: segments it rejects are Non_Teaching_Content without an LLM call
+USE_PREFILTER = True
+PREFILTER_RULES = {
+    "min_words": 3,
+    "stop_phrases": [
+        "can you hear me", "am i audible", "is my voice clear", "is my screen visible",
+        "mic check", "hello", "hello everyone", "hi everyone", "good morning", "good afternoon",
+        "good evening", "thank you", "thanks for watching", "okay", "ok", "yes", "haan", "hmm",
+    ],
+    "max_repetition_ratio": 0.7,
+    "min_words_for_repetition": 8,
+    "min_words_per_second": 0.25,
+    "max_words_per_second": 7.0,
+}
+# BM25 pre-classifier: segments matching one topic clearly are tagged without the LLM.
+# It predicts the topic only; the action tag is taken from the nearest LLM-tagged neighbour.
+USE_LOCAL_TOPIC_CLASSIFIER = True
+LOCAL_TAGGING_MIN_SCORE = 3.0  # lowest BM25 score accepted for the best topic
+LOCAL_TAGGING_MIN_MARGIN = 0.5  # lowest relative lead of the best topic over the runner-up
+LOCAL_TAGGING_AUDIT_SAMPLE = 20  # locally tagged segments re-checked by the LLM to report agreement
+LOCAL_TAGGING_INHERIT_DISTANCE = 10  # farthest LLM-tagged neighbour, in segments, a local segment takes its action tag from
+# Consecutive segments are tagged together in windows; labels are copied back per segment
+USE_TAGGING_WINDOWS = True
+TAGGING_WINDOW_SECONDS = 45  # longest window; 30-60 s keeps one topic per window
+TAGGING_WINDOW_MAX_TOKENS = 400  # largest window text in prompt tokens
+TAGGING_WINDOW_MAX_GAP = 3.0  # a longer pause (seconds) starts a new window
 MIN_CONSECUTIVE_CHUNKS = 3
 top_n_content_types = 3
 MAX_GAP_CHUNKS = 1
+AUDIO_SEGMENT_LENGTH = 20  # seconds per ASR chunk
+ASR_SAMPLE_RATE = 16000  # Whisper consumes 16 kHz mono
+# "files" writes chunk_N.wav, "memory" keeps NumPy views over one decoded buffer,
+# "stream" decodes window by window with constant memory (multi-hour recordings),
+# "vad" streams too but cuts chunks at pauses and drops non-speech regions
+AUDIO_CHUNK_MODE = "stream"
+VAD_ENERGY_THRESHOLD_DB = -40.0  # frames quieter than this (dBFS) count as silence
+VAD_MIN_SILENCE_MS = 600  # pause length that closes a chunk
+ASR_BATCH_SIZE = 8  # audio chunks per Whisper forward pass
+ASR_MODEL_ID = "Oriserve/Whisper-Hindi2Hinglish-Swift"
+ASR_DEVICE = None  # None picks cuda when available, else cpu
+ASR_DTYPE = None  # None picks float16 on cuda, float32 on cpu
+# "pytorch", or for CPU workers "int8" (dynamic quantization) / "onnx" (ONNX Runtime)
+ASR_BACKEND = "pytorch"
+ASR_NUM_WORKERS = 1  # > 1 shards batches across worker processes
+ASR_THREADS_PER_WORKER = None  # None splits the cores evenly across workers
+SLIDE_INDEX_CACHE_DIR = "data/cache/slides"  # parsed slide text, titles and notes by deck file hash
+USE_TRANSCRIPT_CACHE = True  # set False to always re-run ASR
+TRANSCRIPT_CACHE_DIR = "data/cache/transcripts"
+TRANSCRIPT_CACHE_MAX_BYTES = 500 * 1024 * 1024  # LRU eviction beyond this size
+PIPELINE_MAX_WORKERS = 4  # stages of independent branches that may run at once
+# Stream ASR segments straight into tagging and post-processing instead of
+# finishing each stage before the next one starts
+PIPELINE_STREAMING = False
+STREAM_QUEUE_SIZE = 64  # transcript segments buffered between ASR and tagging
 
 importance_matrix = {
     "Content_Type": ["Theory", "Example", "Exercise", "Q&A"],
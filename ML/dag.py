@@ -0,0 +1,214 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+
+class StopPipeline(Exception):
+    """Raised by a stage to end the run early without an error. Stages already running still finish."""
+
+
+class Stage:
+    """
+    One node of the pipeline graph.
+
+    Parameters:
+    - name: Stage name used in logs.
+    - fn: Callable invoked with the stage inputs as keyword arguments. With one
+      output it returns that value; with several it returns a tuple in `outputs` order.
+    - inputs: Names of values the stage needs.
+    - outputs: Names of values the stage produces.
+    """
+
+    def __init__(self, name, fn, inputs=(), outputs=()):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+    def run(self, values):
+        result = self.fn(**{name: values[name] for name in self.inputs})
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        if not self.outputs:
+            return {}
+        return dict(zip(self.outputs, result))
+
+
+class DagExecutor:
+    """
+    Runs stages as soon as their inputs are available, so independent branches
+    execute concurrently on a thread pool.
+
+    Stages spend their time in ffmpeg subprocesses, torch kernels or network
+    calls, all of which release the GIL, so threads are enough to overlap them.
+    """
+
+    def __init__(self, stages, max_workers=4):
+        self.stages = list(stages)
+        self.max_workers = max_workers
+        self.stop_reason = None
+        self._validate()
+
+    def _validate(self):
+        producers = {}
+        for stage in self.stages:
+            for output in stage.outputs:
+                if output in producers:
+                    raise ValueError(
+                        f"Value '{output}' is produced by both '{producers[output]}' and '{stage.name}'.")
+                producers[output] = stage.name
+        for stage in self.stages:
+            missing = [name for name in stage.inputs if name not in producers]
+            if missing:
+                raise ValueError(
+                    f"Stage '{stage.name}' needs {missing}, which no stage produces.")
+
+        # Kahn's algorithm: every stage must become runnable, otherwise there is a cycle
+        available = set()
+        remaining = list(self.stages)
+        while remaining:
+            ready = [s for s in remaining if all(
+                name in available for name in s.inputs)]
+            if not ready:
+                raise ValueError(
+                    f"Pipeline graph has a cycle among {[s.name for s in remaining]}.")
+            for stage in ready:
+                available.update(stage.outputs)
+                remaining.remove(stage)
+
+    def run(self):
+        """
+        Executes the graph.
+
+        When a stage raises StopPipeline, the remaining stages are skipped and
+        `stop_reason` holds its message. Any BackgroundIterator output is closed
+        before returning, so a stream whose consumer never ran (or failed) does
+        not leave its producer thread blocked.
+
+        Returns:
+        - Dict of every value produced by the stages that ran.
+        """
+        values = {}
+        try:
+            self._run_stages(values)
+        finally:
+            for value in values.values():
+                if isinstance(value, BackgroundIterator):
+                    value.close()
+        return values
+
+    def _run_stages(self, values):
+        pending = list(self.stages)
+        running = {}
+        error = None
+        stopped = False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                if error is None and not stopped:
+                    ready = [s for s in pending if all(
+                        name in values for name in s.inputs)]
+                    for stage in ready:
+                        pending.remove(stage)
+                        logger.info(f"Stage '{stage.name}' started.")
+                        running[pool.submit(stage.run, values)] = (
+                            stage, time.perf_counter())
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, started = running.pop(future)
+                    elapsed = time.perf_counter() - started
+                    try:
+                        values.update(future.result())
+                        logger.info(
+                            f"Stage '{stage.name}' finished in {elapsed:.2f}s.")
+                    except StopPipeline as e:
+                        logger.info(
+                            f"Stage '{stage.name}' stopped the pipeline: {e}")
+                        stopped = True
+                        self.stop_reason = str(e)
+                    except Exception as e:
+                        logger.error(
+                            f"Stage '{stage.name}' failed after {elapsed:.2f}s: {e}")
+                        if error is None:
+                            error = e
+
+        if error is not None:
+            raise error
+
+
+class BackgroundIterator:
+    """
+    Runs a producer generator on its own thread and hands its items over
+    through a bounded queue, so a slow consumer holds the producer back at
+    `maxsize` items instead of letting it run ahead without limit.
+
+    Iterating yields the items in order; an exception in the producer is
+    re-raised in the consumer once the items before it are consumed.
+
+    close() stops the producer early: it finishes the item in hand, then its
+    generator is closed so its `finally` blocks run (e.g. killing ffmpeg).
+    Leaving the iteration early, or an error while consuming, closes it too.
+    """
+
+    _DONE = object()
+    _PUT_TIMEOUT = 0.5  # seconds between checks of the stop flag while the queue is full
+
+    def __init__(self, produce, maxsize):
+        self._queue = queue.Queue(maxsize)
+        self._error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(produce,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        """Queues `item`, giving up once close() was called. Returns whether it was queued."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=self._PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, produce):
+        items = None
+        try:
+            items = produce()
+            for item in items:
+                if not self._put(item):
+                    break
+        except BaseException as e:
+            self._error = e
+        finally:
+            try:
+                if hasattr(items, "close"):
+                    items.close()
+            except BaseException as e:
+                logger.warning(f"Closing the background producer failed: {e}")
+            self._put(self._DONE)
+
+    def close(self):
+        """Stops the producer and waits for its thread to exit. Safe to call more than once."""
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def __iter__(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is self._DONE:
+                    break
+                yield item
+        finally:
+            self.close()
+        if self._error is not None:
+            raise self._error
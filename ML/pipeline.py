@@ -1,50 +1,57 @@
 from Transcription.audio_splitter import AudioSplitter
-from Transcription.audio_transcriber import transcribe_audio_chunks
+from Transcription.audio_transcriber import iter_transcribed_segments
 from Transcription.transcript_merger import merge_chunk_transcripts
-from TopicSegmentation import TopicExtraction
-from LLMCaller.llm_call import Caller
+from Transcription.transcript_cache import TranscriptCache
+from Transcription.model_registry import registry
+from TopicSegmentation import TopicClassifier, TopicExtraction, agreement_rate, cluster_topics
+from LLMCaller.llm_call import AsyncCaller, Caller, token_usage
+from LLMCaller.response_cache import get_shared_cache
+from LLMCaller.rate_limiter import count_tokens
 from LLMCaller.prompt import *
-from utility import time_to_seconds, assign_cluster_ids_and_build_map
+from utility import time_to_seconds, assign_cluster_ids_and_build_map, file_content_hash, load_json
+from checkpoint import RunManifest
+from dag import BackgroundIterator, DagExecutor, Stage, StopPipeline
 from processor.processing import *
+from processor.prefilter import prefilter_segments
+from processor.windowing import WindowBuilder, coalesce_segments, project_window_labels
 import config
-from moviepy.editor import VideoFileClip
+import asyncio
+import itertools
+import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
 import json
-import time
 
 logger = logging.getLogger(__name__)
 
 
-def extract_audio_from_video(video_path, audio_input_path, audio_output_path):
-    logger.info("Extracting audio from video...")
+def split_audio_into_chunks(video_path, audio_output_path):
+    logger.info("Extracting and splitting audio into chunks...")
     try:
         os.makedirs(audio_output_path, exist_ok=True)
     except OSError as e:
         logger.error(f"Failed to create audio output directory: {e}")
         raise
-    video = VideoFileClip(video_path)
-    video.audio.write_audiofile(audio_input_path)
-    video.close()
-    logger.info("Audio extracted successfully.")
-
-
-def split_audio_into_chunks(audio_input_path, audio_output_path):
-    logger.info("Splitting audio into chunks...")
     audio_splitter = AudioSplitter(
-        audio_input_path, audio_output_path, segment_length=20)
-    chunk_files = audio_splitter.split_audio()
+        video_path, audio_output_path, segment_length=config.AUDIO_SEGMENT_LENGTH,
+        sample_rate=config.ASR_SAMPLE_RATE)
+    if config.AUDIO_CHUNK_MODE == "stream":
+        logger.info("Audio chunks will be streamed lazily into the transcriber.")
+        return audio_splitter.iter_chunks()
+    if config.AUDIO_CHUNK_MODE == "vad":
+        logger.info("Audio chunks will be cut at pauses and silence dropped.")
+        return audio_splitter.iter_voice_chunks(
+            energy_threshold_db=config.VAD_ENERGY_THRESHOLD_DB,
+            min_silence_ms=config.VAD_MIN_SILENCE_MS)
+    if config.AUDIO_CHUNK_MODE == "memory":
+        chunk_manifest = audio_splitter.split_audio_in_memory()
+    else:
+        chunk_manifest = audio_splitter.split_audio()
     logger.info(
-        f"Audio splitting completed. {len(chunk_files)} chunks created.")
-    return chunk_files
-
-
-def transcribe_chunks(chunk_files):
-    logger.info("Transcribing audio chunks...")
-    chunk_transcripts = transcribe_audio_chunks(
-        chunk_files, audio_chunk_duration=20)
-    logger.info("Transcription completed successfully.")
-    return chunk_transcripts
+        f"Audio splitting completed. {len(chunk_manifest)} chunks created.")
+    return chunk_manifest
 
 
 def merge_and_save_transcripts(chunk_transcripts, transcript_output_path):
@@ -61,9 +68,212 @@ def merge_and_save_transcripts(chunk_transcripts, transcript_output_path):
     return final_transcript
 
 
+def asr_settings():
+    """Every setting that shapes the ASR output, for cache and checkpoint keys."""
+    device, dtype, backend = registry.resolve(
+        config.ASR_DEVICE, config.ASR_DTYPE, config.ASR_BACKEND)
+    settings = {
+        "model_id": config.ASR_MODEL_ID,
+        "device": device,
+        "dtype": dtype,
+        "backend": backend,
+        "task": "transcribe",
+        "sample_rate": config.ASR_SAMPLE_RATE,
+        "segment_length": config.AUDIO_SEGMENT_LENGTH,
+        "chunk_mode": config.AUDIO_CHUNK_MODE,
+    }
+    if config.AUDIO_CHUNK_MODE == "vad":
+        settings["vad_energy_threshold_db"] = config.VAD_ENERGY_THRESHOLD_DB
+        settings["vad_min_silence_ms"] = config.VAD_MIN_SILENCE_MS
+    return settings
+
+
+def transcript_cache_key(video_hash):
+    """
+    Cache key for a lecture's transcript: the video file's content hash plus the
+    ASR settings. Hashing the file bytes keeps a cache hit free of any audio decode.
+    """
+    return TranscriptCache.make_key(video_hash, **asr_settings())
+
+
+def _cached_chunk_transcripts(video_path, video_hash):
+    """
+    Looks the lecture up in the transcript cache.
+
+    Returns:
+    - (cache, cache_key, chunk_transcripts); chunk_transcripts is None on a miss,
+      and all three are None when the transcript cache is disabled.
+    """
+    if not config.USE_TRANSCRIPT_CACHE:
+        return None, None, None
+    cache = TranscriptCache(
+        config.TRANSCRIPT_CACHE_DIR, config.TRANSCRIPT_CACHE_MAX_BYTES)
+    cache_key = transcript_cache_key(video_hash or file_content_hash(video_path))
+    chunk_transcripts = cache.get(cache_key)
+    if chunk_transcripts is not None:
+        logger.info(
+            f"Transcript cache hit ({cache_key[:12]}). Skipping ASR.")
+    else:
+        logger.info(f"Transcript cache miss ({cache_key[:12]}).")
+    return cache, cache_key, chunk_transcripts
+
+
+def _resume_chunks(chunk_manifest, progress):
+    """
+    Splits the chunks against a ProgressLog left by an interrupted run.
+
+    Returns:
+    - (done_segments, remaining_chunks, on_chunk_done): chunks finish in order, so
+      the done segments are a prefix of the transcript; on_chunk_done logs each
+      new chunk. Without a ProgressLog nothing is done and nothing is logged.
+    """
+    if progress is None:
+        return [], chunk_manifest, None
+    done_segments = [
+        segment for chunk_id in sorted(progress.items) for segment in progress.get(chunk_id)]
+    remaining_chunks = (
+        chunk for chunk in chunk_manifest if chunk.chunk_id not in progress)
+
+    def on_chunk_done(chunk, segments):
+        progress.append(chunk.chunk_id, segments)
+    return done_segments, remaining_chunks, on_chunk_done
+
+
+def stream_transcript(video_path, audio_output_path, transcript_output_path, progress=None, video_hash=None):
+    """
+    Splits, transcribes and merges the lecture audio, yielding merged transcript
+    segments as the ASR produces them, then saves the transcript (and fills the
+    transcript cache) once the last chunk is done. The chunk transcripts come
+    from the transcript cache when the same video was already transcribed with
+    the same ASR settings. With a ProgressLog, an interrupted run resumes at the
+    first chunk that was not transcribed yet. `video_hash` is the
+    file_content_hash of the video, if the caller already has it.
+    """
+    cache, cache_key, chunk_transcripts = _cached_chunk_transcripts(video_path, video_hash)
+    if chunk_transcripts is not None:
+        yield from merge_and_save_transcripts(chunk_transcripts, transcript_output_path)["segments"]
+        return
+
+    chunk_manifest = split_audio_into_chunks(video_path, audio_output_path)
+    chunk_transcripts, chunk_manifest, on_chunk_done = _resume_chunks(chunk_manifest, progress)
+    yield from merge_chunk_transcripts(chunk_transcripts)["segments"]
+    logger.info("Transcribing audio chunks...")
+    for segment in iter_transcribed_segments(
+            chunk_manifest, batch_size=config.ASR_BATCH_SIZE, model_id=config.ASR_MODEL_ID,
+            device=config.ASR_DEVICE, dtype=config.ASR_DTYPE, backend=config.ASR_BACKEND,
+            num_workers=config.ASR_NUM_WORKERS, threads_per_worker=config.ASR_THREADS_PER_WORKER,
+            on_chunk_done=on_chunk_done):
+        chunk_transcripts.append(segment)
+        yield from merge_chunk_transcripts([segment])["segments"]
+    logger.info("Transcription completed successfully.")
+    if cache is not None:
+        cache.put(cache_key, chunk_transcripts)
+    merge_and_save_transcripts(chunk_transcripts, transcript_output_path)
+
+
+def transcribe_video(video_path, audio_output_path, transcript_output_path, progress=None, video_hash=None):
+    """Blocking form of stream_transcript: returns the whole merged transcript."""
+    return merge_chunk_transcripts(list(stream_transcript(
+        video_path, audio_output_path, transcript_output_path, progress=progress, video_hash=video_hash)))
+
+
+def load_slide_texts(ppt_path):
+    """Per-slide text from the cached slide index; parses the deck only if it is not indexed yet."""
+    topic_extractor = TopicExtraction(ppt_path, cache_dir=config.SLIDE_INDEX_CACHE_DIR)
+    return [slide['text'] for slide in topic_extractor.slide_index]
+
+
+def _split_topics_by_tokens(topic_list, counts, token_budget):
+    """
+    Splits the topic list, in order, into groups whose reduce prompt stays within
+    `token_budget` tokens.
+
+    Returns:
+    - List of (topics, counts) groups.
+    """
+    overhead = count_tokens(system_prompt_final_topics()) + \
+        count_tokens(build_user_prompt_final_topics([], counts))
+    groups = [([], [])]
+    group_tokens = overhead
+    for topic, count, line in zip(topic_list, counts, format_topic_lines(topic_list, counts)):
+        topic_tokens = count_tokens(line) + 1
+        if groups[-1][0] and group_tokens + topic_tokens > token_budget:
+            groups.append(([], []))
+            group_tokens = overhead
+        groups[-1][0].append(topic)
+        groups[-1][1].append(count)
+        group_tokens += topic_tokens
+    return groups
+
+
+def dedup_candidate_topics(topic_list, threshold):
+    """
+    Collapses near-duplicate window sub-topics before the reduce step and logs how
+    much smaller that makes the final-topics prompt.
+
+    Returns:
+    - (deduped topic list, counts aligned with it)
+    """
+    clusters = cluster_topics(topic_list, threshold, config.TOPIC_DEDUP_NGRAM)
+    deduped = [topic for topic, _ in clusters]
+    counts = [count for _, count in clusters]
+    tokens_before = count_tokens(build_user_prompt_final_topics(topic_list))
+    tokens_after = count_tokens(build_user_prompt_final_topics(deduped, counts))
+    saved = 1 - tokens_after / tokens_before if tokens_before else 0.0
+    logger.info(
+        f"Topic dedup: {len(topic_list)} -> {len(deduped)} sub-topics, final prompt "
+        f"{tokens_before} -> {tokens_after} tokens ({saved:.0%} smaller)")
+    return deduped, counts
+
+
+def reduce_topics(topic_list, llm_caller, max_prompt_tokens, max_workers, counts=None):
+    """
+    Reduces the window sub-topics to the final topic titles.
+
+    When the sub-topics do not fit in one reduce prompt of `max_prompt_tokens`,
+    they are split into groups that do, the groups are reduced concurrently,
+    and their combined titles are reduced again, level by level, until one
+    final prompt fits.
+
+    Parameters:
+    - counts: Optional near-duplicate counts aligned with `topic_list`, shown in
+      the first level's prompts.
+
+    Returns:
+    - The final topic list.
+    """
+    system_prompt_final_topics_text = system_prompt_final_topics()
+    counts = counts or [1] * len(topic_list)
+
+    def reduce(group):
+        group_topics, group_counts = group
+        llm_output = llm_caller.call(
+            system_prompt_final_topics_text, build_user_prompt_final_topics(group_topics, group_counts),
+            max_tokens=config.LLM_MAX_TOKENS["final_topics"], usage_label="final_topics")
+        return parse_llm_output_to_list(llm_output)
+
+    level = 0
+    while True:
+        groups = _split_topics_by_tokens(topic_list, counts, max_prompt_tokens)
+        if len(groups) < 2:
+            break
+        level += 1
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            reduced = [topic for group_topics in pool.map(reduce, groups)
+                       for topic in group_topics]
+        logger.info(
+            f"Topic reduce level {level}: {len(topic_list)} sub-topics in {len(groups)} groups -> {len(reduced)}")
+        shrunk = len(reduced) < len(topic_list)
+        topic_list, counts = reduced, [1] * len(reduced)
+        if not shrunk:
+            # Not shrinking any further; the final call gets what is left
+            break
+    return reduce((topic_list, counts))
+
+
 def extract_topics_from_slides(ppt_path, model, api_key, temperature, base_url, final_topic_path):
     logger.info("Extracting topics from PowerPoint slides...")
-    topic_extractor = TopicExtraction(ppt_path)
+    topic_extractor = TopicExtraction(ppt_path, cache_dir=config.SLIDE_INDEX_CACHE_DIR)
     slide_text = topic_extractor.extract_slide_text()
     if not slide_text:
         logger.warning("Slide text empty. Skipping LLM.")
@@ -71,24 +281,30 @@ def extract_topics_from_slides(ppt_path, model, api_key, temperature, base_url,
     window_size = topic_extractor.get_window_size(len(slide_text))
     segmented_slides = topic_extractor.group_slides_by_window(window_size)
     llm_caller = Caller(model, api_key, temperature, base_url)
-    logger.info("Calling LLM to extract topics from slides...")
+    logger.info(
+        f"Calling LLM to extract topics from {len(segmented_slides)} slide windows...")
     system_prompt_all_topics_text = system_prompt_all_topics()
-    topic_list = []
-    for group in segmented_slides:
+
+    def extract_window_topics(group):
         group_text = " ".join([slide['text'] for slide in group])
-        tokens_estimated = len(group_text.split())
-        llm_caller.enforce_rate_limit(tokens_estimated)
         user_prompt_all_topics = build_user_prompt_all_topics(group_text)
         topics = llm_caller.call(
-            system_prompt_all_topics_text, user_prompt_all_topics)
-        for item in parse_llm_output_to_list(topics):
-            topic_list.append(item)
+            system_prompt_all_topics_text, user_prompt_all_topics,
+            max_tokens=config.LLM_MAX_TOKENS["all_topics"], usage_label="all_topics")
+        return parse_llm_output_to_list(topics)
+
+    # Map: windows are independent, so they run concurrently under the shared
+    # rate limiter; map() keeps the results in slide order
+    with ThreadPoolExecutor(max_workers=config.TOPIC_EXTRACTION_CONCURRENCY) as pool:
+        topic_list = [item for window_topics in pool.map(extract_window_topics, segmented_slides)
+                      for item in window_topics]
     # Refining Topic Extraction
-    system_prompt_final_topics_text = system_prompt_final_topics()
-    user_prompt_final_topics = build_user_prompt_final_topics(topic_list)
-    llm_output = llm_caller.call(
-        system_prompt_final_topics_text, user_prompt_final_topics)
-    final_topic_list = parse_llm_output_to_list(llm_output)
+    counts = None
+    if config.USE_TOPIC_DEDUP:
+        topic_list, counts = dedup_candidate_topics(topic_list, config.TOPIC_DEDUP_THRESHOLD)
+    final_topic_list = reduce_topics(
+        topic_list, llm_caller, config.TOPIC_REDUCE_MAX_PROMPT_TOKENS, config.TOPIC_EXTRACTION_CONCURRENCY,
+        counts=counts)
     print(final_topic_list)
     logger.info("Topics extracted successfully.")
     try:
@@ -101,25 +317,263 @@ def extract_topics_from_slides(ppt_path, model, api_key, temperature, base_url,
     return final_topic_list
 
 
-def tag_transcript_with_topics(final_transcript, final_topic_list, llm_caller, topic_tagged_transcript_output_path):
-    logger.info("Processing transcript tagging with LLM...")
-    system_prompt_topic_tagging_text = system_prompt_topic_tagging()
-    processed_results = []
-    for chunk_id, chunk in enumerate(final_transcript["segments"], start=1):
-        chunk['chunk_id'] = chunk_id
-        user_prompt_topic_tagging = build_user_prompt_topic_tagging(
-            chunk['text'], final_topic_list)
-        llm_output = llm_caller.call(
-            system_prompt_topic_tagging_text, user_prompt_topic_tagging)
-        structured_result = parse_topic_tagged_llm_response(
+def _parse_segment_response(llm_output, chunk, final_topic_list):
+    if config.TAGGING_PROMPT_MODE == "compact":
+        return parse_compact_topic_tagged_llm_response(
             llm_output,
             chunk_id=chunk['chunk_id'],
             chunk_start=chunk['start'],
             chunk_end=chunk['end'],
-            chunk_text=chunk['text']
+            chunk_text=chunk['text'],
+            topic_list=final_topic_list
         )
-        processed_results.append(structured_result)
-        time.sleep(2)
+    return parse_topic_tagged_llm_response(
+        llm_output,
+        chunk_id=chunk['chunk_id'],
+        chunk_start=chunk['start'],
+        chunk_end=chunk['end'],
+        chunk_text=chunk['text']
+    )
+
+
+def prefilter_non_teaching(final_transcript, rules):
+    """
+    Labels greetings, mic checks, empty or very short segments and Whisper
+    repetition loops as Non_Teaching_Content without the LLM.
+
+    Returns:
+    - Dict of chunk_id -> result carrying a 'prefilter_reason'; pass it as `pretagged` to a tagging driver.
+    """
+    segments = final_transcript["segments"]
+    for chunk_id, chunk in enumerate(segments, start=1):
+        chunk['chunk_id'] = chunk_id
+    prefiltered = prefilter_segments(segments, rules)
+    reasons = {}
+    for result in prefiltered.values():
+        reasons[result['prefilter_reason']] = reasons.get(result['prefilter_reason'], 0) + 1
+    logger.info(
+        f"Prefilter labelled {len(prefiltered)} of {len(segments)} segments as non-teaching: {reasons}")
+    return prefiltered
+
+
+def _local_result(chunk, topic_name, margin):
+    """
+    Tagged result for a segment the local classifier matched to `topic_name`.
+
+    The classifier only predicts the topic: the segment is kept because it
+    repeats slide vocabulary, and its action tag is left None until
+    iter_inherit_action_tags copies one from an LLM-tagged neighbour. It has no
+    confidence score; the BM25 margin is kept separately as 'local_margin'.
+    """
+    return {
+        "chunk_id": chunk['chunk_id'],
+        "start": chunk['start'],
+        "end": chunk['end'],
+        "text": chunk['text'],
+        "action_tag": None,
+        "topic_name": topic_name,
+        "keep": True,
+        "confidence_score": None,
+        "local_margin": margin,
+        "tagged_by": "local"
+    }
+
+
+def pretag_segments_locally(final_transcript, final_topic_list, slide_texts, min_score, min_margin, exclude=()):
+    """
+    Tags the segments that lexically match one topic by a clear margin, without the LLM.
+
+    Parameters:
+    - final_transcript: Transcript dict with 'segments'.
+    - final_topic_list: Final topic names.
+    - slide_texts: Slide text strings that enrich the topic vocabulary.
+    - min_score, min_margin: Thresholds of TopicClassifier.classify.
+    - exclude: chunk_ids already labelled (e.g. by the prefilter), left out of the classifier.
+
+    Returns:
+    - Dict of chunk_id -> tagged result for the confident segments (see
+      _local_result); pass it as `pretagged` to a tagging driver.
+    """
+    for chunk_id, chunk in enumerate(final_transcript["segments"], start=1):
+        chunk['chunk_id'] = chunk_id
+    segments = [chunk for chunk in final_transcript["segments"]
+                if chunk['chunk_id'] not in exclude]
+    classifier = TopicClassifier(final_topic_list, slide_texts)
+    predictions = classifier.classify(
+        [chunk['text'] for chunk in segments], min_score, min_margin)
+    pretagged = {}
+    for chunk, prediction in zip(segments, predictions):
+        if prediction is None:
+            continue
+        pretagged[chunk['chunk_id']] = _local_result(chunk, *prediction)
+    share = len(pretagged) / len(segments) if segments else 0.0
+    logger.info(
+        f"Local classifier tagged {len(pretagged)} of {len(segments)} segments ({share:.0%}); "
+        f"only {len(segments) - len(pretagged)} go to the LLM.")
+    return pretagged
+
+
+def inherit_local_action_tags(tagged_results, max_distance):
+    """Runs iter_inherit_action_tags over the finished results and logs how many local results got an action tag."""
+    tagged_results = list(iter_inherit_action_tags(tagged_results, max_distance))
+    local = [result for result in tagged_results if result.get("tagged_by") == "local"]
+    untagged = sum(1 for result in local if result["action_tag"] is None)
+    logger.info(
+        f"Locally tagged segments took the action tag of an LLM-tagged neighbour: "
+        f"{len(local) - untagged} of {len(local)} ({untagged} without a neighbour within {max_distance} segments).")
+    return tagged_results
+
+
+def audit_local_tags(pretagged, final_topic_list, llm_caller, sample_size, seed=0):
+    """
+    Sends a random sample of locally tagged segments to the LLM and logs how often both agree on the topic.
+
+    The sampled segments keep the LLM's answer. Returns the agreement rate (nan when nothing was sampled).
+    """
+    sample_ids = random.Random(seed).sample(
+        sorted(pretagged), min(sample_size, len(pretagged)))
+    local_results, llm_results = [], []
+    for chunk_id in sample_ids:
+        local_result = pretagged[chunk_id]
+        llm_output = llm_caller.call(
+            **_tagging_request(local_result['text'], final_topic_list))
+        local_results.append(local_result)
+        llm_results.append(_parse_segment_response(llm_output, local_result, final_topic_list))
+        pretagged[chunk_id] = llm_results[-1]
+    rate = agreement_rate(local_results, llm_results)
+    if sample_ids:
+        logger.info(
+            f"Local classifier agreed with the LLM on {rate:.0%} of {len(sample_ids)} sampled segments.")
+    return rate
+
+
+def _tagging_request(chunk_text, final_topic_list):
+    """
+    Arguments of a single-segment tagging call: prompts and a right-sized output
+    budget. In the compact prompt mode the stable rules and numbered topics lead
+    the prompt and the answer is one short line. The answer is not streamed: the
+    budget already caps it at little more than the answer itself.
+    """
+    if config.TAGGING_PROMPT_MODE == "compact":
+        return {
+            "system_prompt": system_prompt_compact_topic_tagging(final_topic_list),
+            "user_prompt": build_user_prompt_compact_topic_tagging(chunk_text),
+            "max_tokens": config.LLM_MAX_TOKENS["compact_topic_tagging"],
+            "usage_label": "topic_tagging",
+        }
+    return {
+        "system_prompt": system_prompt_topic_tagging(),
+        "user_prompt": build_user_prompt_topic_tagging(chunk_text, final_topic_list),
+        "max_tokens": config.LLM_MAX_TOKENS["topic_tagging"],
+        "usage_label": "topic_tagging",
+    }
+
+
+def _batch_tagging_request(chunk_texts, final_topic_list):
+    """
+    Arguments of a batch tagging call. The output budget grows with the number
+    of segments, so the answer is streamed and cut off if the model keeps
+    writing after the last segment.
+    """
+    if config.TAGGING_PROMPT_MODE == "compact":
+        return {
+            "system_prompt": system_prompt_compact_batch_topic_tagging(final_topic_list),
+            "user_prompt": build_user_prompt_compact_batch_topic_tagging(chunk_texts),
+            "max_tokens": config.LLM_MAX_TOKENS["compact_topic_tagging"] * len(chunk_texts),
+            "stop_when": compact_batch_topic_tagging_complete(len(chunk_texts)),
+            "usage_label": "batch_topic_tagging",
+        }
+    return {
+        "system_prompt": system_prompt_batch_topic_tagging(),
+        "user_prompt": build_user_prompt_batch_topic_tagging(chunk_texts, final_topic_list),
+        "max_tokens": config.LLM_MAX_TOKENS["topic_tagging"] * len(chunk_texts),
+        "stop_when": batch_topic_tagging_complete(len(chunk_texts)),
+        "usage_label": "batch_topic_tagging",
+    }
+
+
+def _parse_batch_response(llm_output, batch, final_topic_list):
+    if config.TAGGING_PROMPT_MODE == "compact":
+        return parse_compact_batch_topic_tagged_llm_response(llm_output, batch, final_topic_list)
+    return parse_batch_topic_tagged_llm_response(llm_output, batch)
+
+
+def _completed_results(segments, progress, pretagged):
+    """chunk_id -> result for segments tagged by an interrupted run or ahead of the LLM (pretagged)."""
+    completed = dict(pretagged or {})
+    if progress is not None:
+        completed.update({chunk['chunk_id']: progress.get(chunk['chunk_id'])
+                          for chunk in segments if chunk['chunk_id'] in progress})
+    return completed
+
+
+def _unique_segments(segments):
+    """
+    Groups segments whose text is identical up to case and surrounding whitespace.
+
+    Returns:
+    - (representatives, repeats): the first segment of each group, and a dict of
+      representative chunk_id -> the later segments with the same text.
+    """
+    representatives = []
+    repeats = {}
+    first_by_text = {}
+    for chunk in segments:
+        text = chunk['text'].strip().lower()
+        if text in first_by_text:
+            repeats[first_by_text[text]['chunk_id']].append(chunk)
+        else:
+            first_by_text[text] = chunk
+            representatives.append(chunk)
+            repeats[chunk['chunk_id']] = []
+    return representatives, repeats
+
+
+def _retarget_result(structured_result, chunk):
+    return {**structured_result, "chunk_id": chunk['chunk_id'], "start": chunk['start'],
+            "end": chunk['end'], "text": chunk['text']}
+
+
+def tag_transcript_in_windows(final_transcript, tag_windows, topic_tagged_transcript_output_path, max_seconds,
+                              max_tokens, max_gap_seconds, pretagged=None):
+    """
+    Tags consecutive segments together in windows of up to `max_seconds` and
+    projects each window's label back onto its segments, so one LLM answer
+    covers several short Whisper segments and every segment keeps its chunk_id.
+
+    Parameters:
+    - final_transcript: Transcript dict with 'segments'.
+    - tag_windows: Callable(window_transcript, output_path) running one of the
+      tagging drivers on a transcript whose segments are the windows.
+    - topic_tagged_transcript_output_path: Where the per-segment results are saved;
+      the per-window results go next to it with a '_windows' suffix.
+    - max_seconds, max_tokens, max_gap_seconds: Window bounds, see coalesce_segments.
+    - pretagged: chunk_id -> result for segments labelled without the LLM; they stay out of the windows.
+
+    Returns:
+    - List of tagged results, one per original segment.
+    """
+    segments = final_transcript["segments"]
+    for chunk_id, chunk in enumerate(segments, start=1):
+        chunk['chunk_id'] = chunk_id
+    pretagged = pretagged or {}
+    windows = coalesce_segments(
+        segments, max_seconds, max_tokens, max_gap_seconds, exclude=pretagged)
+    windows_output_path = f"{os.path.splitext(topic_tagged_transcript_output_path)[0]}_windows.json"
+    window_results = tag_windows({"segments": windows}, windows_output_path)
+
+    tagged = {**pretagged, **project_window_labels(windows, window_results, segments)}
+    windowed_count = len(segments) - len(pretagged)
+    reduction = 1 - len(windows) / windowed_count if windowed_count else 0.0
+    logger.info(
+        f"Coalesced {windowed_count} segments into {len(windows)} tagging windows "
+        f"({reduction:.0%} fewer items for the LLM).")
+    processed_results = [tagged[chunk['chunk_id']] for chunk in segments]
+    save_tagged_transcript(processed_results, topic_tagged_transcript_output_path)
+    return processed_results
+
+
+def save_tagged_transcript(processed_results, topic_tagged_transcript_output_path):
     try:
         with open(topic_tagged_transcript_output_path, "w", encoding="utf-8") as f:
             json.dump(processed_results, f, indent=2, ensure_ascii=False)
@@ -129,6 +583,285 @@ def tag_transcript_with_topics(final_transcript, final_topic_list, llm_caller, t
     logger.info(
         f"Topic-tagged transcript saved at: {topic_tagged_transcript_output_path}")
     logger.info("Transcript tagging completed successfully.")
+
+
+def tag_transcript_with_topics(final_transcript, final_topic_list, llm_caller, topic_tagged_transcript_output_path,
+                               progress=None, pretagged=None):
+    logger.info("Processing transcript tagging with LLM...")
+    for chunk_id, chunk in enumerate(final_transcript["segments"], start=1):
+        chunk['chunk_id'] = chunk_id
+    completed = _completed_results(final_transcript["segments"], progress, pretagged)
+    processed_results = []
+    for chunk in final_transcript["segments"]:
+        chunk_id = chunk['chunk_id']
+        if chunk_id in completed:
+            processed_results.append(completed[chunk_id])
+            continue
+        llm_output = llm_caller.call(
+            **_tagging_request(chunk['text'], final_topic_list))
+        structured_result = _parse_segment_response(llm_output, chunk, final_topic_list)
+        processed_results.append(structured_result)
+        if progress is not None:
+            progress.append(chunk_id, structured_result)
+    save_tagged_transcript(processed_results, topic_tagged_transcript_output_path)
+    return processed_results
+
+
+def _batch_tagging_steps(batch, final_topic_list):
+    """
+    Request and retry rules for one batch of segments, shared by the sync and
+    async drivers: one batch request, then the single-segment prompt for every
+    segment missing from the answer.
+
+    A generator that yields the arguments of each LLM call, is sent the call's
+    output, and returns the results aligned with `batch`.
+    """
+    results = [None]
+    if len(batch) > 1:
+        llm_output = yield _batch_tagging_request([chunk['text'] for chunk in batch], final_topic_list)
+        results = _parse_batch_response(llm_output, batch, final_topic_list)
+    for idx, chunk in enumerate(batch):
+        if results[idx] is None:
+            llm_output = yield _tagging_request(chunk['text'], final_topic_list)
+            results[idx] = _parse_segment_response(llm_output, chunk, final_topic_list)
+    return results
+
+
+def _tag_batch(batch, final_topic_list, llm_caller):
+    """
+    Tags a batch of segments (see _batch_tagging_steps) with blocking calls.
+
+    Returns:
+    - (results aligned with `batch`, number of LLM requests made)
+    """
+    steps = _batch_tagging_steps(batch, final_topic_list)
+    request_count = 0
+    try:
+        request = next(steps)
+        while True:
+            request_count += 1
+            request = steps.send(llm_caller.call(**request))
+    except StopIteration as done:
+        return done.value, request_count
+
+
+def iter_tagged_segments(segments, final_topic_list, llm_caller, max_concurrency=8, batch_size=8,
+                         window_bounds=None, prefilter_rules=None, classifier=None, progress=None):
+    """
+    Streaming tagger: consumes transcript segments as they arrive and yields
+    their tagged results in chunk order, while up to `max_concurrency` batches
+    of LLM requests are in flight on a thread pool.
+
+    Each segment is first resolved without the LLM when possible (earlier run
+    via `progress`, the prefilter rules, then the local `classifier`); the rest
+    are coalesced into windows with `window_bounds` = (max_seconds, max_tokens,
+    max_gap_seconds) when given, and tagged `batch_size` windows per request.
+
+    Parameters:
+    - segments: Iterable of transcript segments with 'chunk_id', 'start', 'end' and 'text'.
+    - classifier: Optional (TopicClassifier, min_score, min_margin). Its results
+      come out without an action tag; pass the stream through iter_inherit_action_tags.
+
+    Yields:
+    - Tagged results in the format of the other tagging drivers.
+    """
+    builder = WindowBuilder(*window_bounds) if window_bounds else None
+    window_ids = itertools.count(1)
+    waiting = {}
+    ready = {}
+    in_flight = deque()
+    batch = []
+    next_chunk_id = 1
+    counts = {"segments": 0, "pretagged": 0, "requests": 0}
+
+    def add_window(window):
+        window['chunk_id'] = next(window_ids)
+        batch.append(window)
+        if len(batch) == batch_size:
+            submit_batch()
+
+    def submit_batch():
+        if batch:
+            in_flight.append(
+                (pool.submit(_tag_batch, list(batch), final_topic_list, llm_caller), list(batch)))
+            batch.clear()
+
+    def collect(wait_all=False):
+        # Results are only consumed from the head so chunk order is preserved
+        while in_flight and (wait_all or in_flight[0][0].done() or len(in_flight) > 2 * max_concurrency):
+            future, windows = in_flight.popleft()
+            results, request_count = future.result()
+            counts["requests"] += request_count
+            for window, result in zip(windows, results):
+                for chunk_id in window['segment_ids']:
+                    ready[chunk_id] = _retarget_result(result, waiting.pop(chunk_id))
+                    if builder is not None:
+                        ready[chunk_id]['window_id'] = window['chunk_id']
+                    if progress is not None:
+                        progress.append(chunk_id, ready[chunk_id])
+
+    def pretag(segment):
+        chunk_id = segment['chunk_id']
+        if progress is not None and chunk_id in progress:
+            return progress.get(chunk_id)
+        if prefilter_rules is not None:
+            prefiltered = prefilter_segments([segment], prefilter_rules)
+            if prefiltered:
+                return prefiltered[chunk_id]
+        if classifier is not None:
+            topic_classifier, min_score, min_margin = classifier
+            prediction = topic_classifier.classify(
+                [segment['text']], min_score, min_margin)[0]
+            if prediction is not None:
+                return _local_result(segment, *prediction)
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        for segment in segments:
+            counts["segments"] += 1
+            result = pretag(segment)
+            if result is not None:
+                counts["pretagged"] += 1
+                ready[segment['chunk_id']] = result
+                if builder is not None:
+                    closed = builder.flush()
+                    if closed is not None:
+                        add_window(closed)
+            else:
+                waiting[segment['chunk_id']] = segment
+                if builder is None:
+                    add_window({"start": segment['start'], "end": segment['end'], "text": segment['text'],
+                                "segment_ids": [segment['chunk_id']]})
+                else:
+                    closed = builder.add(segment)
+                    if closed is not None:
+                        add_window(closed)
+            collect()
+            while next_chunk_id in ready:
+                yield ready.pop(next_chunk_id)
+                next_chunk_id += 1
+
+        if builder is not None:
+            closed = builder.flush()
+            if closed is not None:
+                add_window(closed)
+        submit_batch()
+        collect(wait_all=True)
+        while next_chunk_id in ready:
+            yield ready.pop(next_chunk_id)
+            next_chunk_id += 1
+
+    logger.info(
+        f"Tagged {counts['segments']} streamed segments with {counts['requests']} LLM requests "
+        f"({counts['pretagged']} labelled without the LLM).")
+
+
+def tag_transcript_with_topics_batched(final_transcript, final_topic_list, llm_caller,
+                                       topic_tagged_transcript_output_path, batch_size=8, progress=None,
+                                       pretagged=None):
+    """
+    Drop-in for tag_transcript_with_topics that tags `batch_size` numbered
+    segments per LLM request, so the system prompt and topic list are paid once
+    per batch instead of once per segment. Segments whose block is missing or
+    malformed in the batch answer are retried one by one with the single-segment
+    prompt. Repeated segments ("okay", "any questions?") are tagged once and the
+    label is copied to every repeat. Segments in `pretagged` (chunk_id -> result,
+    see pretag_segments_locally) are not sent.
+    """
+    logger.info(
+        f"Processing transcript tagging with LLM ({batch_size} segments per request)...")
+    segments = final_transcript["segments"]
+    for chunk_id, chunk in enumerate(segments, start=1):
+        chunk['chunk_id'] = chunk_id
+    completed = _completed_results(segments, progress, pretagged)
+    pending = [chunk for chunk in segments if chunk['chunk_id'] not in completed]
+    representatives, repeats = _unique_segments(pending)
+
+    tagged = {}
+    request_count = 0
+    for start in range(0, len(representatives), batch_size):
+        batch = representatives[start:start + batch_size]
+        batch_results, batch_request_count = _tag_batch(batch, final_topic_list, llm_caller)
+        request_count += batch_request_count
+        for chunk, structured_result in zip(batch, batch_results):
+            for target in [chunk] + repeats[chunk['chunk_id']]:
+                tagged[target['chunk_id']] = _retarget_result(structured_result, target)
+                if progress is not None:
+                    progress.append(target['chunk_id'], tagged[target['chunk_id']])
+
+    logger.info(
+        f"Tagged {len(pending)} segments with {request_count} LLM requests.")
+    processed_results = [
+        tagged[chunk['chunk_id']] if chunk['chunk_id'] in tagged else completed[chunk['chunk_id']]
+        for chunk in segments]
+    save_tagged_transcript(processed_results, topic_tagged_transcript_output_path)
+    return processed_results
+
+
+async def _tag_segments_async(segments, final_topic_list, async_caller, max_concurrency, batch_size, progress,
+                              pretagged):
+    semaphore = asyncio.Semaphore(max_concurrency)
+    request_count = 0
+
+    async def call(request):
+        nonlocal request_count
+        async with semaphore:
+            request_count += 1
+            return await async_caller.call(**request)
+
+    async def tag_batch(batch):
+        steps = _batch_tagging_steps(batch, final_topic_list)
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(await call(request))
+        except StopIteration as done:
+            results = done.value
+        for chunk, result in zip(batch, results):
+            for target in [chunk] + repeats[chunk['chunk_id']]:
+                tagged[target['chunk_id']] = _retarget_result(result, target)
+                if progress is not None:
+                    progress.append(target['chunk_id'], tagged[target['chunk_id']])
+
+    completed = _completed_results(segments, progress, pretagged)
+    pending = [chunk for chunk in segments if chunk['chunk_id'] not in completed]
+    representatives, repeats = _unique_segments(pending)
+    tagged = {}
+    batches = [representatives[start:start + batch_size]
+               for start in range(0, len(representatives), batch_size)]
+    try:
+        await asyncio.gather(*(tag_batch(batch) for batch in batches))
+    finally:
+        await async_caller.aclose()
+
+    logger.info(
+        f"Tagged {len(pending)} segments with {request_count} LLM requests.")
+    return [tagged[chunk['chunk_id']] if chunk['chunk_id'] in tagged else completed[chunk['chunk_id']]
+            for chunk in segments]
+
+
+def tag_transcript_with_topics_async(final_transcript, final_topic_list, async_caller,
+                                     topic_tagged_transcript_output_path, max_concurrency=8, batch_size=1,
+                                     progress=None, pretagged=None):
+    """
+    Concurrent version of tag_transcript_with_topics.
+
+    Keeps up to `max_concurrency` tagging requests in flight through an
+    AsyncCaller, whose rate limiter replaces the fixed sleep after every call.
+    With `batch_size` > 1 each request tags that many numbered segments, as in
+    tag_transcript_with_topics_batched. Repeated segments are tagged once.
+    Results keep transcript order. The
+    caller's connection pool is closed when tagging finishes.
+    """
+    logger.info(
+        f"Processing transcript tagging with LLM ({max_concurrency} concurrent requests, "
+        f"{batch_size} segments per request)...")
+    segments = final_transcript["segments"]
+    for chunk_id, chunk in enumerate(segments, start=1):
+        chunk['chunk_id'] = chunk_id
+    processed_results = asyncio.run(_tag_segments_async(
+        segments, final_topic_list, async_caller, max_concurrency, batch_size, progress, pretagged))
+    save_tagged_transcript(processed_results, topic_tagged_transcript_output_path)
     return processed_results
 
 
@@ -200,10 +933,25 @@ def post_process_and_generate_video(processed_results, subjectwise_importance_ma
         f"Highlight video generated successfully at: {os.path.join(output_dir, highlight_video_name)}")
 
 
+def log_llm_stats():
+    """Logs the LLM token usage per call type and the response cache hit rate of this run."""
+    token_usage.log_summary()
+    if config.USE_LLM_CACHE:
+        get_shared_cache(config.LLM_CACHE_PATH, config.LLM_CACHE_TTL_SECONDS,
+                         config.LLM_CACHE_MAX_BYTES).log_stats()
+
+
+def log_pipeline_outcome(executor):
+    """Logs whether the run went through every stage or a stage stopped it early."""
+    if executor.stop_reason is not None:
+        logger.info(f"Pipeline stopped early: {executor.stop_reason}")
+    else:
+        logger.info("Pipeline executed successfully")
+
+
 def run_pipeline():
     try:
         audio_output_path = config.audio_output_path
-        audio_input_path = config.audio_input_path
         transcript_output_path = config.transcript_output_path
         ppt_path = config.ppt_path
         final_topic_path = config.final_topic_path
@@ -226,37 +974,241 @@ def run_pipeline():
             raise ValueError(
                 "API key is not set. Please set the API key in the environment variables.")
 
-        extract_audio_from_video(
-            video_path, audio_input_path, audio_output_path)
-        chunk_files = split_audio_into_chunks(
-            audio_input_path, audio_output_path)
-        chunk_transcripts = transcribe_chunks(chunk_files)
-        final_transcript = merge_and_save_transcripts(
-            chunk_transcripts, transcript_output_path)
-        final_topic_list = extract_topics_from_slides(
-            ppt_path, model, api_key, temperature, base_url, final_topic_path)
-        if not final_topic_list:
+        run_manifest = RunManifest(
+            os.path.join(output_dir, "run_manifest.json"))
+
+        def transcribe_stage():
+            video_hash = file_content_hash(video_path)
+            transcribe_key = RunManifest.make_key(video_hash, asr_settings())
+            final_transcript = run_manifest.run_stage(
+                "transcribe", transcribe_key, [transcript_output_path],
+                compute=lambda: transcribe_video(
+                    video_path, audio_output_path, transcript_output_path,
+                    progress=run_manifest.progress("transcribe", transcribe_key), video_hash=video_hash),
+                load=lambda: load_json(transcript_output_path))
+            return final_transcript, transcribe_key
+
+        def topics_stage():
+            topics_key = RunManifest.make_key(
+                file_content_hash(ppt_path), model, temperature, base_url,
+                system_prompt_all_topics(), system_prompt_final_topics(),
+                config.TOPIC_REDUCE_MAX_PROMPT_TOKENS, config.USE_TOPIC_DEDUP,
+                config.TOPIC_DEDUP_THRESHOLD, config.TOPIC_DEDUP_NGRAM,
+                config.LLM_MAX_TOKENS["all_topics"], config.LLM_MAX_TOKENS["final_topics"])
+            final_topic_list = run_manifest.run_stage(
+                "topics", topics_key, [final_topic_path],
+                compute=lambda: extract_topics_from_slides(
+                    ppt_path, model, api_key, temperature, base_url, final_topic_path),
+                load=lambda: load_json(final_topic_path))
+            if not final_topic_list:
+                raise StopPipeline("No topics extracted from the slides.")
+            return final_topic_list, topics_key
+
+        def make_tagging_key(transcribe_key, topics_key):
+            return RunManifest.make_key(
+                transcribe_key, topics_key, model, temperature, base_url, system_prompt_topic_tagging(),
+                config.TAGGING_BATCH_SIZE, system_prompt_batch_topic_tagging(),
+                config.USE_LOCAL_TOPIC_CLASSIFIER, config.LOCAL_TAGGING_MIN_SCORE,
+                config.LOCAL_TAGGING_MIN_MARGIN, config.LOCAL_TAGGING_AUDIT_SAMPLE,
+                config.LOCAL_TAGGING_INHERIT_DISTANCE,
+                config.USE_PREFILTER, config.PREFILTER_RULES, config.USE_TAGGING_WINDOWS,
+                config.TAGGING_WINDOW_SECONDS, config.TAGGING_WINDOW_MAX_TOKENS, config.TAGGING_WINDOW_MAX_GAP,
+                config.PIPELINE_STREAMING, config.TAGGING_PROMPT_MODE,
+                system_prompt_compact_topic_tagging([]), system_prompt_compact_batch_topic_tagging([]),
+                config.LLM_MAX_TOKENS["topic_tagging"], config.LLM_MAX_TOKENS["compact_topic_tagging"])
+
+        def tagging_stage(final_transcript, transcribe_key, final_topic_list, topics_key):
+            tagging_key = make_tagging_key(transcribe_key, topics_key)
+            progress = run_manifest.progress("tagging", tagging_key)
+
+            def tag():
+                llm_caller = Caller(model, api_key, temperature, base_url)
+                pretagged = {}
+                if config.USE_PREFILTER:
+                    pretagged.update(prefilter_non_teaching(
+                        final_transcript, config.PREFILTER_RULES))
+                if config.USE_LOCAL_TOPIC_CLASSIFIER:
+                    slide_texts = load_slide_texts(ppt_path)
+                    locally_tagged = pretag_segments_locally(
+                        final_transcript, final_topic_list, slide_texts,
+                        config.LOCAL_TAGGING_MIN_SCORE, config.LOCAL_TAGGING_MIN_MARGIN, exclude=pretagged)
+                    audit_local_tags(locally_tagged, final_topic_list,
+                                     llm_caller, config.LOCAL_TAGGING_AUDIT_SAMPLE)
+                    pretagged.update(locally_tagged)
+
+                def run_driver(transcript, output_path, pretagged=None):
+                    if config.TAGGING_CONCURRENCY > 1:
+                        async_caller = AsyncCaller(
+                            model, api_key, temperature, base_url, max_connections=config.TAGGING_CONCURRENCY)
+                        return tag_transcript_with_topics_async(
+                            transcript, final_topic_list, async_caller, output_path,
+                            max_concurrency=config.TAGGING_CONCURRENCY, batch_size=config.TAGGING_BATCH_SIZE,
+                            progress=progress, pretagged=pretagged)
+                    if config.TAGGING_BATCH_SIZE > 1:
+                        return tag_transcript_with_topics_batched(
+                            transcript, final_topic_list, llm_caller, output_path,
+                            batch_size=config.TAGGING_BATCH_SIZE, progress=progress, pretagged=pretagged)
+                    return tag_transcript_with_topics(
+                        transcript, final_topic_list, llm_caller, output_path,
+                        progress=progress, pretagged=pretagged)
+
+                if config.USE_TAGGING_WINDOWS:
+                    tagged_results = tag_transcript_in_windows(
+                        final_transcript, run_driver, topic_tagged_transcript_output_path,
+                        config.TAGGING_WINDOW_SECONDS, config.TAGGING_WINDOW_MAX_TOKENS,
+                        config.TAGGING_WINDOW_MAX_GAP, pretagged=pretagged)
+                else:
+                    tagged_results = run_driver(
+                        final_transcript, topic_tagged_transcript_output_path, pretagged=pretagged)
+                if config.USE_LOCAL_TOPIC_CLASSIFIER:
+                    tagged_results = inherit_local_action_tags(
+                        tagged_results, config.LOCAL_TAGGING_INHERIT_DISTANCE)
+                    save_tagged_transcript(tagged_results, topic_tagged_transcript_output_path)
+                return tagged_results
+
+            return run_manifest.run_stage(
+                "tagging", tagging_key, [topic_tagged_transcript_output_path],
+                compute=tag, load=lambda: load_json(topic_tagged_transcript_output_path))
+
+        def post_process_stage(tagged_results):
+            analyze_results(tagged_results)
+            processed_results = smooth_and_merge_chunks(
+                tagged_results, min_consecutive_chunks, topic_smooth_chunks_output_path)
+            processed_results = refine_keep(processed_results)
+            return assign_clusters_and_save(
+                processed_results, cluster_map_output_path)
+
+        def highlight_video_stage(processed_results):
+            post_process_and_generate_video(
+                processed_results,
+                subjectwise_importance_matrix,
+                subject,
+                top_n_content_types,
+                max_gap_chunks,
+                video_path,
+                output_dir,
+                highlight_video_name
+            )
+
+        def transcript_stream_stage():
+            video_hash = file_content_hash(video_path)
+            transcribe_key = RunManifest.make_key(video_hash, asr_settings())
+            if run_manifest.is_complete("transcribe", transcribe_key):
+                logger.info(
+                    f"Stage 'transcribe' already completed. Streaming {transcript_output_path}")
+                final_transcript = load_json(transcript_output_path)
+                return BackgroundIterator(lambda: iter(final_transcript["segments"]),
+                                          config.STREAM_QUEUE_SIZE), transcribe_key
+
+            def produce():
+                progress = run_manifest.progress("transcribe", transcribe_key)
+                yield from stream_transcript(
+                    video_path, audio_output_path, transcript_output_path, progress=progress,
+                    video_hash=video_hash)
+                run_manifest.mark_complete(
+                    "transcribe", transcribe_key, [transcript_output_path])
+                progress.clear()
+
+            return BackgroundIterator(produce, config.STREAM_QUEUE_SIZE), transcribe_key
+
+        def streaming_tagging_stage(segment_stream, transcribe_key, final_topic_list, topics_key):
+            try:
+                return tag_segment_stream(segment_stream, transcribe_key, final_topic_list, topics_key)
+            finally:
+                # Stops the ASR thread and its ffmpeg decode if tagging fails mid-stream
+                segment_stream.close()
+
+        def tag_segment_stream(segment_stream, transcribe_key, final_topic_list, topics_key):
+            tagging_key = make_tagging_key(transcribe_key, topics_key)
+            if run_manifest.is_complete("tagging", tagging_key):
+                # Drain the stream so the transcript stage still completes
+                for _ in segment_stream:
+                    pass
+                logger.info(
+                    f"Stage 'tagging' already completed. Loading {topic_tagged_transcript_output_path}")
+                return post_process_stage(load_json(topic_tagged_transcript_output_path))
+            progress = run_manifest.progress("tagging", tagging_key)
+            classifier = None
+            if config.USE_LOCAL_TOPIC_CLASSIFIER:
+                slide_texts = load_slide_texts(ppt_path)
+                classifier = (TopicClassifier(final_topic_list, slide_texts),
+                              config.LOCAL_TAGGING_MIN_SCORE, config.LOCAL_TAGGING_MIN_MARGIN)
+            window_bounds = None
+            if config.USE_TAGGING_WINDOWS:
+                window_bounds = (config.TAGGING_WINDOW_SECONDS, config.TAGGING_WINDOW_MAX_TOKENS,
+                                 config.TAGGING_WINDOW_MAX_GAP)
+            segments = ({**segment, 'chunk_id': chunk_id}
+                        for chunk_id, segment in enumerate(segment_stream, start=1))
+            tagged = iter_tagged_segments(
+                segments, final_topic_list, Caller(model, api_key, temperature, base_url),
+                max_concurrency=config.TAGGING_CONCURRENCY, batch_size=config.TAGGING_BATCH_SIZE,
+                window_bounds=window_bounds,
+                prefilter_rules=config.PREFILTER_RULES if config.USE_PREFILTER else None,
+                classifier=classifier, progress=progress)
+            if classifier is not None:
+                tagged = iter_inherit_action_tags(tagged, config.LOCAL_TAGGING_INHERIT_DISTANCE)
+
+            # Later steps mutate the chunks, so each checkpoint file gets a snapshot
+            tagged_results, smoothed_results = [], []
+
+            def snapshot(chunks, sink):
+                for chunk in chunks:
+                    sink.append(dict(chunk))
+                    yield chunk
+
+            processed_results = list(iter_refine_keep(snapshot(
+                iter_smooth_topic_transitions(snapshot(tagged, tagged_results), min_consecutive_chunks),
+                smoothed_results)))
+
+            save_tagged_transcript(tagged_results, topic_tagged_transcript_output_path)
+            run_manifest.mark_complete(
+                "tagging", tagging_key, [topic_tagged_transcript_output_path])
+            progress.clear()
+            analyze_results(tagged_results)
+            save_topic_smoothed_chunks(smoothed_results, topic_smooth_chunks_output_path)
+            logger.info(
+                f"Smoothed topic chunks saved at: {topic_smooth_chunks_output_path}")
+            return assign_clusters_and_save(processed_results, cluster_map_output_path)
+
+        if config.PIPELINE_STREAMING:
+            # ASR feeds tagging through a bounded queue and smoothing runs as
+            # results arrive, so ASR and LLM time overlap instead of adding up.
+            executor = DagExecutor([
+                Stage("transcribe_stream", transcript_stream_stage,
+                      outputs=("segment_stream", "transcribe_key")),
+                Stage("topics", topics_stage,
+                      outputs=("final_topic_list", "topics_key")),
+                Stage("streaming_tagging", streaming_tagging_stage,
+                      inputs=("segment_stream", "transcribe_key",
+                              "final_topic_list", "topics_key"),
+                      outputs=("processed_results",)),
+                Stage("highlight_video", highlight_video_stage,
+                      inputs=("processed_results",)),
+            ], max_workers=config.PIPELINE_MAX_WORKERS)
+            executor.run()
+            log_llm_stats()
+            log_pipeline_outcome(executor)
             return
-        llm_caller = Caller(model, api_key, temperature, base_url)
-        processed_results = tag_transcript_with_topics(
-            final_transcript, final_topic_list, llm_caller, topic_tagged_transcript_output_path)
-        analyze_results(processed_results)
-        processed_results = smooth_and_merge_chunks(
-            processed_results, min_consecutive_chunks, topic_smooth_chunks_output_path)
-        processed_results = refine_keep(processed_results)
-        processed_results = assign_clusters_and_save(
-            processed_results, cluster_map_output_path)
-        post_process_and_generate_video(
-            processed_results,
-            subjectwise_importance_matrix,
-            subject,
-            top_n_content_types,
-            max_gap_chunks,
-            video_path,
-            output_dir,
-            highlight_video_name
-        )
-        logger.info("Pipeline executed successfully")
+
+        # Slides -> topics has no dependency on video -> audio -> ASR, so the
+        # two branches run concurrently and join at tagging.
+        executor = DagExecutor([
+            Stage("transcribe", transcribe_stage,
+                  outputs=("final_transcript", "transcribe_key")),
+            Stage("topics", topics_stage,
+                  outputs=("final_topic_list", "topics_key")),
+            Stage("tagging", tagging_stage,
+                  inputs=("final_transcript", "transcribe_key",
+                          "final_topic_list", "topics_key"),
+                  outputs=("tagged_results",)),
+            Stage("post_process", post_process_stage,
+                  inputs=("tagged_results",), outputs=("processed_results",)),
+            Stage("highlight_video", highlight_video_stage,
+                  inputs=("processed_results",)),
+        ], max_workers=config.PIPELINE_MAX_WORKERS)
+        executor.run()
+        log_llm_stats()
+        log_pipeline_outcome(executor)
     except Exception as e:
         logger.error(f"Pipeline execution failed: {e}")
         raise
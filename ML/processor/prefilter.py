@@ -0,0 +1,86 @@
+import re
+from utility import timestamp_to_seconds
+
+_WORD_PATTERN = re.compile(r"\w+(?:'\w+)?")
+
+
+def _words(text):
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def non_teaching_reason(segment, rules):
+    """
+    Returns why a transcript segment is clearly not teaching content, or None.
+
+    Parameters:
+    - segment: Transcript segment with 'text', 'start' and 'end' ('HH:MM:SS.xx').
+    - rules: Dict with
+        - min_words: Segments with fewer words are too short to teach anything.
+        - stop_phrases: Greetings, mic checks and similar phrases; a segment that is
+          little more than these phrases is dropped.
+        - max_repetition_ratio: Share of repeated words (1 - distinct / total) above which
+          the segment is taken as a Whisper hallucination loop.
+        - min_words_for_repetition: Shortest segment the repetition rule applies to.
+        - min_words_per_second, max_words_per_second: Speech density bounds; too sparse
+          is mostly silence or noise, too dense is hallucinated text.
+
+    Returns:
+    - Reason string ("empty", "too_short", "stop_phrase", "repetition_loop",
+      "low_speech_density", "high_speech_density") or None.
+    """
+    words = _words(segment.get("text") or "")
+    if not words:
+        return "empty"
+    if len(words) < rules["min_words"]:
+        return "too_short"
+
+    normalized = f" {' '.join(words)} "
+    for phrase in rules["stop_phrases"]:
+        normalized = normalized.replace(f" {' '.join(_words(phrase))} ", " ")
+    if len(normalized.split()) < rules["min_words"]:
+        return "stop_phrase"
+
+    if len(words) >= rules["min_words_for_repetition"]:
+        repetition_ratio = 1 - len(set(words)) / len(words)
+        if repetition_ratio > rules["max_repetition_ratio"]:
+            return "repetition_loop"
+
+    duration = timestamp_to_seconds(segment["end"]) - timestamp_to_seconds(segment["start"])
+    if duration > 0:
+        words_per_second = len(words) / duration
+        if words_per_second < rules["min_words_per_second"]:
+            return "low_speech_density"
+        if words_per_second > rules["max_words_per_second"]:
+            return "high_speech_density"
+    return None
+
+
+def prefilter_segments(segments, rules):
+    """
+    Labels the clearly non-teaching segments without calling the LLM.
+
+    Parameters:
+    - segments: Transcript segments, each with a 'chunk_id'.
+    - rules: See non_teaching_reason.
+
+    Returns:
+    - Dict of chunk_id -> result with the fields of parse_topic_tagged_llm_response
+      for Non_Teaching_Content, plus 'prefilter_reason'.
+    """
+    filtered = {}
+    for segment in segments:
+        reason = non_teaching_reason(segment, rules)
+        if reason is None:
+            continue
+        filtered[segment["chunk_id"]] = {
+            "chunk_id": segment["chunk_id"],
+            "start": segment["start"],
+            "end": segment["end"],
+            "text": segment["text"],
+            "action_tag": "n/a",
+            "topic_name": "n/a",
+            "keep": False,
+            "confidence_score": 0.0,
+            "prefilter_reason": reason
+        }
+    return filtered
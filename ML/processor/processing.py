@@ -1,5 +1,6 @@
 import json
 import os
+from collections import deque
 from pathlib import Path
 from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
 
@@ -56,6 +57,140 @@ def smooth_topic_transitions(keep_chunks, min_consecutive_chunks):
     return smoothed_chunks
 
 
+def _is_action_source(result):
+    """True for an LLM-tagged teaching result, whose action tag others can inherit."""
+    return result.get("tagged_by") != "local" and result["keep"] and result["action_tag"] not in (None, "n/a")
+
+
+def _inherit_action_tag(entry, max_distance):
+    position, result = entry["position"], entry["result"]
+    for before, after in ((entry["before_same"], entry["after_same"]), (entry["before_any"], entry["after_any"])):
+        candidates = [candidate for candidate in (before, after)
+                      if candidate is not None and abs(candidate[0] - position) <= max_distance]
+        if candidates:
+            # min() keeps the first of equal distances, i.e. the earlier neighbour
+            _, source = min(candidates, key=lambda candidate: abs(candidate[0] - position))
+            result["action_tag"] = source["action_tag"]
+            result["action_tag_from"] = source["chunk_id"]
+            return
+
+
+def iter_inherit_action_tags(results, max_distance):
+    """
+    Gives every locally tagged result (tagged_by "local", no action tag) the action
+    tag of the nearest LLM-tagged teaching result within `max_distance` segments:
+    one with the same topic if there is one, else one of any topic. Ties go to the
+    earlier neighbour; 'action_tag_from' records the chunk_id it came from. A local
+    result with no such neighbour keeps action_tag None.
+
+    Parameters:
+    - results: Tagged results in chunk order, e.g. a stream from the tagging driver.
+    - max_distance: Farthest neighbour, in segments, an action tag is taken from.
+
+    Yields:
+    - The same results in the same order. A local result is held back until no
+      later result could be nearer, at most `max_distance` results.
+    """
+    last_same = {}
+    last_any = None
+    held = deque()
+
+    def settled(entry, position):
+        if not entry["local"] or entry["after_same"] is not None:
+            return True
+        before = entry["before_same"]
+        if before is not None and position - entry["position"] >= entry["position"] - before[0]:
+            return True
+        return position - entry["position"] >= max_distance
+
+    position = -1
+    for position, result in enumerate(results):
+        if _is_action_source(result):
+            for entry in held:
+                if entry["local"]:
+                    if entry["after_same"] is None and entry["result"]["topic_name"] == result["topic_name"]:
+                        entry["after_same"] = (position, result)
+                    if entry["after_any"] is None:
+                        entry["after_any"] = (position, result)
+        local = result.get("tagged_by") == "local" and result["action_tag"] is None
+        held.append({"position": position, "result": result, "local": local,
+                     "before_same": last_same.get(result["topic_name"]) if local else None,
+                     "before_any": last_any if local else None, "after_same": None, "after_any": None})
+        if _is_action_source(result):
+            last_same[result["topic_name"]] = (position, result)
+            last_any = (position, result)
+        while held and settled(held[0], position):
+            entry = held.popleft()
+            if entry["local"]:
+                _inherit_action_tag(entry, max_distance)
+            yield entry["result"]
+    while held:
+        entry = held.popleft()
+        if entry["local"]:
+            _inherit_action_tag(entry, max_distance)
+        yield entry["result"]
+
+
+def iter_smooth_topic_transitions(chunks, min_consecutive_chunks):
+    """
+    Streaming form of smooth_topic_transitions followed by the merge back into
+    all chunks: takes every chunk (keep or not) in order and yields each one as
+    soon as the next `min_consecutive_chunks` keep chunks settle its topic.
+    Non-keep chunks pass through unchanged.
+
+    Parameters:
+    - chunks: Iterable of all transcript chunks in order.
+    - min_consecutive_chunks: Minimum number of consecutive chunks required to accept a topic change.
+
+    Yields:
+    - The chunks, in order, with smoothed topic_name on keep chunks.
+    """
+    pending = deque()
+    last_topic = None
+    started = False
+
+    def release(final):
+        nonlocal last_topic, started
+        while pending:
+            if not pending[0]["keep"]:
+                yield pending.popleft()
+                continue
+            head = pending[0]
+            if not started:
+                last_topic = head["topic_name"]
+                started = True
+            if head["topic_name"] == last_topic:
+                yield pending.popleft()
+                continue
+
+            keep_chunks = [chunk for chunk in pending if chunk["keep"]]
+            if len(keep_chunks) < min_consecutive_chunks and not final:
+                return
+            # Same decision as smooth_topic_transitions over the next keep chunks
+            new_topic = head["topic_name"]
+            consecutive_count = 1
+            for chunk in keep_chunks[1:min_consecutive_chunks]:
+                if chunk["topic_name"] == new_topic:
+                    consecutive_count += 1
+                else:
+                    break
+            if consecutive_count >= min_consecutive_chunks:
+                last_topic = new_topic
+            for chunk in keep_chunks[:consecutive_count]:
+                chunk["topic_name"] = last_topic
+            decided = keep_chunks[consecutive_count - 1]
+            while True:
+                chunk = pending.popleft()
+                yield chunk
+                if chunk is decided:
+                    break
+
+    for chunk in chunks:
+        pending.append(chunk)
+        yield from release(final=False)
+    yield from release(final=True)
+
+
 def merge_and_save_topic_smoothed_chunks(all_chunks, smoothed_keep_chunks, output_path):
     """
     Merge smoothed keep chunks back into all chunks and save as JSON.
@@ -80,11 +215,73 @@ def merge_and_save_topic_smoothed_chunks(all_chunks, smoothed_keep_chunks, outpu
             # Keep original non-keep chunk
             updated_chunks.append(chunk)
 
-    # Save to JSON
+    save_topic_smoothed_chunks(updated_chunks, output_path)
+    return updated_chunks
+
+
+def save_topic_smoothed_chunks(chunks, output_path):
+    """
+    Save the topic-smoothed chunks as JSON.
+
+    Parameters:
+    - chunks: Full list of transcript chunks after smoothing.
+    - output_path: Path to save the JSON file.
+    """
     with open(output_path, "w") as f:
-        json.dump(updated_chunks, f, indent=2)
+        json.dump(chunks, f, indent=2)
+
+
+def _refine_middle_chunk(prev_chunk, curr_chunk, next_chunk):
+    # Rule 1: Fill false gap if both sides are true and same topic
+    if (
+        curr_chunk["keep"] == False
+        and prev_chunk["keep"] == True
+        and next_chunk["keep"] == True
+        and prev_chunk["topic_name"] == next_chunk["topic_name"]
+    ):
+        curr_chunk["keep"] = True
+        curr_chunk["topic_name"] = prev_chunk["topic_name"]
+        curr_chunk["reason_for_keep_change"] = "Sandwiched between same topic"
+
+    # Rule 2: Remove isolated true chunk
+    elif (
+        curr_chunk["keep"] == True
+        and prev_chunk["keep"] == False
+        and next_chunk["keep"] == False
+    ):
+        curr_chunk["keep"] = False
+        curr_chunk["reason_for_keep_change"] = "Isolated teaching chunk"
+
+    # Rule 3: Mark unchanged chunks consistently
+    elif "reason_for_keep_change" not in curr_chunk or curr_chunk["reason_for_keep_change"] in ("", None):
+        curr_chunk["reason_for_keep_change"] = "Original"
+
+
+def iter_refine_keep(chunks):
+    """
+    Streaming form of refine_keep: applies the same rules with one chunk of
+    lookahead and yields each chunk once its neighbours can no longer change it.
 
-    return updated_chunks
+    Parameters:
+    - chunks: Iterable of transcript chunks in order.
+
+    Yields:
+    - The refined chunks, in order.
+    """
+    window = []
+    for chunk in chunks:
+        window.append(chunk)
+        if len(window) == 3:
+            _refine_middle_chunk(*window)
+            done = window.pop(0)
+            if not done.get("reason_for_keep_change"):
+                done["reason_for_keep_change"] = "Original"
+            yield done
+    # Ensure first and last chunk also have consistent reason_for_keep_change
+    for done in window:
+        if not done.get("reason_for_keep_change"):
+            done["reason_for_keep_change"] = "Original"
+        yield done
 
 
 def refine_keep(all_chunks):
@@ -98,44 +295,7 @@ def refine_keep(all_chunks):
     Returns:
     - List of updated chunks with refined 'keep' values and consistent reason_for_keep_change field.
     """
-    updated_chunks = all_chunks.copy()
-
-    for i in range(1, len(updated_chunks) - 1):
-        prev_chunk = updated_chunks[i - 1]
-        curr_chunk = updated_chunks[i]
-        next_chunk = updated_chunks[i + 1]
-
-        # Rule 1: Fill false gap if both sides are true and same topic
-        if (
-            curr_chunk["keep"] == False
-            and prev_chunk["keep"] == True
-            and next_chunk["keep"] == True
-            and prev_chunk["topic_name"] == next_chunk["topic_name"]
-        ):
-            curr_chunk["keep"] = True
-            curr_chunk["topic_name"] = prev_chunk["topic_name"]
-            curr_chunk["reason_for_keep_change"] = "Sandwiched between same topic"
-
-        # Rule 2: Remove isolated true chunk
-        elif (
-            curr_chunk["keep"] == True
-            and prev_chunk["keep"] == False
-            and next_chunk["keep"] == False
-        ):
-            curr_chunk["keep"] = False
-            curr_chunk["reason_for_keep_change"] = "Isolated teaching chunk"
-
-        # Rule 3: Mark unchanged chunks consistently
-        elif "reason_for_keep_change" not in curr_chunk or curr_chunk["reason_for_keep_change"] in ("", None):
-            curr_chunk["reason_for_keep_change"] = "Original"
-
-    # Ensure first and last chunk also have consistent reason_for_keep_change
-    if "reason_for_keep_change" not in updated_chunks[0] or not updated_chunks[0]["reason_for_keep_change"]:
-        updated_chunks[0]["reason_for_keep_change"] = "Original"
-    if "reason_for_keep_change" not in updated_chunks[-1] or not updated_chunks[-1]["reason_for_keep_change"]:
-        updated_chunks[-1]["reason_for_keep_change"] = "Original"
-
-    return updated_chunks
+    return list(iter_refine_keep(all_chunks))
 
 
 def generate_ordered_highlight_blocks(filtered_chunks, max_gap_chunks=1):
@@ -0,0 +1,97 @@
+from LLMCaller.rate_limiter import count_tokens
+from utility import timestamp_to_seconds
+
+
+class WindowBuilder:
+    """
+    Incremental form of coalesce_segments for segments that arrive one at a time.
+
+    add() returns the window a segment closed, if any; flush() closes the open
+    window, e.g. at the end of the stream or before an excluded segment.
+    """
+
+    def __init__(self, max_seconds, max_tokens, max_gap_seconds):
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.max_gap_seconds = max_gap_seconds
+        self._current = None
+        self._start = None
+        self._tokens = 0
+        self._previous_end = None
+
+    def add(self, segment):
+        start = timestamp_to_seconds(segment["start"])
+        end = timestamp_to_seconds(segment["end"])
+        tokens = count_tokens(segment["text"])
+        closed = None
+        if self._current is not None and (
+                end - self._start > self.max_seconds
+                or self._tokens + tokens > self.max_tokens
+                or start - self._previous_end > self.max_gap_seconds):
+            closed = self.flush()
+        if self._current is None:
+            self._current = {"start": segment["start"], "end": segment["end"], "text": segment["text"].strip(),
+                             "segment_ids": [segment["chunk_id"]]}
+            self._start = start
+            self._tokens = tokens
+        else:
+            self._current["end"] = segment["end"]
+            self._current["text"] = f"{self._current['text']} {segment['text'].strip()}"
+            self._current["segment_ids"].append(segment["chunk_id"])
+            self._tokens += tokens
+        self._previous_end = end
+        return closed
+
+    def flush(self):
+        closed, self._current = self._current, None
+        return closed
+
+
+def coalesce_segments(segments, max_seconds, max_tokens, max_gap_seconds, exclude=()):
+    """
+    Merges consecutive transcript segments into tagging windows.
+
+    A window closes before a segment that would push it past `max_seconds` or
+    `max_tokens`, before a pause longer than `max_gap_seconds` (pauses tend to
+    mark topic changes), and around segments in `exclude`, which are already
+    labelled and never join a window.
+
+    Parameters:
+    - segments: Transcript segments with 'chunk_id', 'start', 'end' and 'text'.
+    - max_seconds: Longest window duration.
+    - max_tokens: Largest window text, in prompt tokens.
+    - max_gap_seconds: Longest pause kept inside a window.
+    - exclude: chunk_ids to leave out.
+
+    Returns:
+    - List of windows, each a dict with 'start', 'end', 'text' and 'segment_ids'.
+    """
+    builder = WindowBuilder(max_seconds, max_tokens, max_gap_seconds)
+    windows = []
+    for segment in segments:
+        closed = builder.flush() if segment["chunk_id"] in exclude else builder.add(segment)
+        if closed is not None:
+            windows.append(closed)
+    closed = builder.flush()
+    if closed is not None:
+        windows.append(closed)
+    return windows
+
+
+def project_window_labels(windows, window_results, segments):
+    """
+    Copies each window's label onto the segments it was built from.
+
+    Returns:
+    - Dict of chunk_id -> tagged result for the segment, with its own id, times and
+      text, and the 'window_id' of the window whose label it carries.
+    """
+    segments_by_id = {segment["chunk_id"]: segment for segment in segments}
+    projected = {}
+    for window, result in zip(windows, window_results):
+        for chunk_id in window["segment_ids"]:
+            segment = segments_by_id[chunk_id]
+            projected[chunk_id] = {**result, "chunk_id": chunk_id, "start": segment["start"],
+                                   "end": segment["end"], "text": segment["text"],
+                                   "window_id": result["chunk_id"]}
+    return projected
@@ -0,0 +1,23 @@
+from processor.processing import iter_inherit_action_tags
+
+
+def _result(chunk_id, topic, action_tag=None, local=False):
+    result = {"chunk_id": chunk_id, "topic_name": topic, "action_tag": action_tag, "keep": True}
+    if local:
+        result["tagged_by"] = "local"
+    return result
+
+
+def test_local_result_takes_the_nearest_same_topic_action_tag():
+    results = [_result(0, "Friction", "Example"), _result(1, "Energy", "Exercise"),
+               _result(2, "Friction", local=True), _result(3, "Energy", "Q&A"), _result(4, "Friction", "Theory")]
+    inherited = list(iter_inherit_action_tags(results, max_distance=5))
+    assert [r["chunk_id"] for r in inherited] == [0, 1, 2, 3, 4]
+    # Same topic wins over the nearer other-topic neighbours; the tie goes to the earlier one
+    assert (inherited[2]["action_tag"], inherited[2]["action_tag_from"]) == ("Example", 0)
+
+
+def test_local_result_without_a_neighbour_in_range_keeps_no_action_tag():
+    results = [_result(0, "Friction", "Theory")] + [_result(i, "Friction", local=True) for i in range(1, 5)]
+    inherited = list(iter_inherit_action_tags(results, max_distance=2))
+    assert [r["action_tag"] for r in inherited] == ["Theory", "Theory", "Theory", None, None]
@@ -0,0 +1,76 @@
+"""The compact tagging parsers must produce the same dicts as the full-format parsers."""
+import pytest
+from LLMCaller.prompt import (
+    parse_batch_topic_tagged_llm_response,
+    parse_compact_batch_topic_tagged_llm_response,
+    parse_compact_topic_tagged_llm_response,
+    parse_topic_tagged_llm_response,
+)
+
+TOPICS = ["Newton's Laws of Motion", "Conservation of Energy", "Friction"]
+CHUNKS = [{"chunk_id": i, "start": f"00:00:{i:02d}.00", "end": f"00:00:{i + 1:02d}.00", "text": f"segment {i}"}
+          for i in range(1, 5)]
+
+
+def _full_answer(content_type, action_tag="n/a", topic_name="n/a", confidence_score="0.0"):
+    return (f"Content_Type: {content_type}\n"
+            f"Action_Tag: {action_tag}\n"
+            f"Topic_Name: {topic_name}\n"
+            f"Confidence_Score: {confidence_score}")
+
+
+def _parse_single(parser, answer, *extra):
+    chunk = CHUNKS[0]
+    return parser(answer, chunk["chunk_id"], chunk["start"], chunk["end"], chunk["text"], *extra)
+
+
+@pytest.mark.parametrize("compact, full", [
+    ("T|T|1|0.9", _full_answer("Teaching_Content", "Theory", "Newton's Laws of Motion", "0.9")),
+    ("T|E|3|0.85", _full_answer("Teaching_Content", "Example", "Friction", "0.85")),
+    ("T|X|2|0.7", _full_answer("Teaching_Content", "Exercise", "Conservation of Energy", "0.7")),
+    ("T|Q|2|1", _full_answer("Teaching_Content", "Q&A", "Conservation of Energy", "1")),
+    ("N|-|0|0.0", _full_answer("Non_Teaching_Content")),
+    ("n|-|0|0.3", _full_answer("Non_Teaching_Content", confidence_score="0.3")),
+])
+def test_compact_single_matches_full(compact, full):
+    compact_result = _parse_single(parse_compact_topic_tagged_llm_response, compact, TOPICS)
+    assert compact_result == _parse_single(parse_topic_tagged_llm_response, full)
+
+
+@pytest.mark.parametrize("compact", ["T|E|4|0.8", "T|E|0|0.8", "no answer", ""])
+def test_compact_single_unusable_answer_matches_unparseable_full_answer(compact):
+    compact_result = _parse_single(parse_compact_topic_tagged_llm_response, compact, TOPICS)
+    assert compact_result == _parse_single(parse_topic_tagged_llm_response, "no answer")
+    assert compact_result["keep"] is False
+
+
+def test_compact_batch_matches_full():
+    compact = "[1] T|T|1|0.9\n[2] N|-|0|0.0\n[3] T|E|3|0.85\n[4] T|Q|2|0.6\n"
+    full = "\n".join([
+        "[1]", _full_answer("Teaching_Content", "Theory", "Newton's Laws of Motion", "0.9"),
+        "[2]", _full_answer("Non_Teaching_Content"),
+        "[3]", _full_answer("Teaching_Content", "Example", "Friction", "0.85"),
+        "[4]", _full_answer("Teaching_Content", "Q&A", "Conservation of Energy", "0.6"),
+    ])
+    compact_results = parse_compact_batch_topic_tagged_llm_response(compact, CHUNKS, TOPICS)
+    assert None not in compact_results
+    assert compact_results == parse_batch_topic_tagged_llm_response(full, CHUNKS)
+
+
+def test_compact_batch_missing_and_out_of_range_lines_match_full():
+    # Segment 2 is missing, segment 3 names a topic that does not exist, segment 9 is not in the batch
+    compact = "[1] T|T|1|0.9\n[3] T|E|7|0.8\n[4] N|-|0|0.0\n[9] T|T|1|0.9\n"
+    full = "\n".join([
+        "[1]", _full_answer("Teaching_Content", "Theory", "Newton's Laws of Motion", "0.9"),
+        "[3]", "Content_Type: Teaching_Content\nAction_Tag: Example\nConfidence_Score: 0.8",
+        "[4]", _full_answer("Non_Teaching_Content"),
+        "[9]", _full_answer("Teaching_Content", "Theory", "Newton's Laws of Motion", "0.9"),
+    ])
+    compact_results = parse_compact_batch_topic_tagged_llm_response(compact, CHUNKS, TOPICS)
+    assert compact_results == parse_batch_topic_tagged_llm_response(full, CHUNKS)
+    assert [result is None for result in compact_results] == [False, True, True, False]
+
+
+def test_compact_batch_empty_answer_matches_full():
+    assert parse_compact_batch_topic_tagged_llm_response("", CHUNKS, TOPICS) == \
+        parse_batch_topic_tagged_llm_response("", CHUNKS) == [None] * len(CHUNKS)
@@ -0,0 +1,16 @@
+from TopicSegmentation import cluster_topics
+
+
+def test_reordered_and_inflected_names_are_merged():
+    topics = ["Introduction to Linear Regression", "Linear Regression Introduction",
+              "Cost Function", "Cost functions", "Gradient Descent"]
+    assert cluster_topics(topics, 0.85) == [
+        ("Introduction to Linear Regression", 2), ("Cost Function", 2), ("Gradient Descent", 1)]
+
+
+def test_names_differing_by_numbers_or_short_tokens_are_kept_apart():
+    topics = ["L1 Regularization", "L2 Regularization", "l1 regularization",
+              "Part 1: Neural Networks", "Part 2: Neural Networks", "Part B Neural Networks"]
+    assert cluster_topics(topics, 0.85) == [
+        ("L1 Regularization", 2), ("L2 Regularization", 1), ("Part 1: Neural Networks", 1),
+        ("Part 2: Neural Networks", 1), ("Part B Neural Networks", 1)]
@@ -1,4 +1,5 @@
 from datetime import timedelta
+import hashlib
 import json
 import logging
 import os
@@ -15,6 +16,19 @@ def setup_logging(log_file_path="logs/pipeline.log"):
         ]
     )
 
+def load_json(path):
+    """Loads a JSON file written by an earlier pipeline stage."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def file_content_hash(path, block_size=1024 * 1024):
+    """SHA-1 of a file's bytes, read in blocks so large videos stay out of memory."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
 def timestamp_to_seconds(ts):
     """Converts a timestamp string like '00:01:30.25' to total seconds as float."""
     try: